@@ -0,0 +1,109 @@
+from r1cs_creator import create_with_extra_constraints
+from r1cs_utils import write_r1cs_to_file
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+OPTIMIZATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(OPTIMIZATIONS_DIR)
+R1CS_JSON_DIR = os.path.join(REPOSITORY_DIR, 'r1cs_json')
+TIME_PASS_SCRIPT = '''
+from single_r1cs import R1CS
+from time import perf_counter
+import json
+import sys
+
+with open(sys.argv[1], 'r') as file:
+    r1cs_json = json.load(file)
+r1cs = R1CS(r1cs_json)
+start = perf_counter()
+getattr(r1cs, sys.argv[2])(**json.loads(sys.argv[3]))
+print(perf_counter() - start)
+'''
+
+def root_revision():
+    result = subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPOSITORY_DIR,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()[-1]
+
+def export_revision(revision, directory):
+    result = subprocess.run(['git', 'archive', '--format=tar', revision, 'optimizations'], cwd=REPOSITORY_DIR,
+                            capture_output=True, check=True)
+    with tarfile.open(fileobj=io.BytesIO(result.stdout)) as archive:
+        archive.extractall(directory)
+    return os.path.join(directory, 'optimizations')
+
+def time_pass(optimizations_dir, path, name, options=None):
+    options = json.dumps(dict() if options is None else options)
+    result = subprocess.run([sys.executable, '-c', TIME_PASS_SCRIPT, os.path.abspath(path), name, options], cwd=optimizations_dir,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1])
+
+def generate_file(directory, spec):
+    num_constraints, _, k_not_zeros = spec.partition(':')
+    num_constraints = int(num_constraints)
+    k_not_zeros = 10 if k_not_zeros == '' else int(k_not_zeros)
+    random.seed(0)
+    r1cs = create_with_extra_constraints(scheme_length=1, num_variables=num_constraints + k_not_zeros + 5, num_vital_constraints=num_constraints,
+                                         num_additional_constraints=max(num_constraints // 10, 1), k_not_zeros=k_not_zeros)
+    path = os.path.join(directory, f'generated_{num_constraints}_{k_not_zeros}.json')
+    write_r1cs_to_file(r1cs, path, True)
+    return path
+
+def is_single_r1cs(path):
+    with open(path, 'r') as file:
+        return type(json.load(file)) == dict
+
+def benchmark_file(path, passes, baseline_dir):
+    result = {'file': os.path.basename(path)}
+    for name in passes:
+        baseline_time = time_pass(baseline_dir, path, name)
+        current_time = time_pass(OPTIMIZATIONS_DIR, path, name)
+        result[name] = (baseline_time, current_time, baseline_time / max(current_time, 1e-9))
+    return result
+
+def benchmark_projection(path):
+    exact_time = time_pass(OPTIMIZATIONS_DIR, path, 'reduce_constraints')
+    projected_time = time_pass(OPTIMIZATIONS_DIR, path, 'reduce_constraints', {'probabilistic': True})
+    return exact_time, projected_time, exact_time / max(projected_time, 1e-9)
+
+if __name__ == "__main__":
+    passes = ['reduce_constraints']
+    files = sys.argv[1:]
+    if '--all-passes' in files:
+        files.remove('--all-passes')
+        passes = ['reduce_constraints', 'reduce_variables', 'reduce_nonzero_coefficients']
+    revision = None
+    if '--baseline' in files:
+        pos = files.index('--baseline')
+        revision = files[pos + 1]
+        del files[pos:pos + 2]
+    revision = root_revision() if revision is None else revision
+    no_baseline = '--no-baseline' in files
+    if no_baseline:
+        files.remove('--no-baseline')
+    generated = []
+    while '--generate' in files:
+        pos = files.index('--generate')
+        generated.append(files[pos + 1])
+        del files[pos:pos + 2]
+    if len(files) == 0 and len(generated) == 0:
+        files = [os.path.join(R1CS_JSON_DIR, name) for name in sorted(os.listdir(R1CS_JSON_DIR)) if name.endswith('.json')]
+    with tempfile.TemporaryDirectory() as directory:
+        files = [path for path in files if is_single_r1cs(path)] + [generate_file(directory, spec) for spec in generated]
+        if not no_baseline:
+            baseline_dir = export_revision(revision, directory)
+            print(f'Baseline revision {revision[:12]}')
+            print('file'.ljust(28) + ''.join([f'{name}: baseline, s / current, s / speedup'.rjust(70) for name in passes]))
+            for path in files:
+                result = benchmark_file(path, passes, baseline_dir)
+                print(result['file'].ljust(28) + ''.join([f'{result[name][0]:34.3f}{result[name][1]:20.3f}{result[name][2]:15.1f}x' for name in passes]))
+        print('file'.ljust(28) + 'reduce_constraints: exact, s / probabilistic, s / speedup'.rjust(70))
+        for path in files:
+            exact_time, projected_time, speedup = benchmark_projection(path)
+            print(os.path.basename(path).ljust(28) + f'{exact_time:31.3f}{projected_time:24.3f}{speedup:14.1f}x')
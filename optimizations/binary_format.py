@@ -0,0 +1,153 @@
+from single_r1cs import R1CS
+from ensemble_r1cs import EnsembleR1CS
+from constraint_matrix import ConstraintMatrix
+from witness_storage import Witness, PackedElements, ELEMENT_SIZE, to_int
+from array import array
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b'R1CSBIN1'
+FILE_HEADER = struct.Struct('<8sQQ')
+MEMBER_HEADER = struct.Struct('<12Q')
+STATE_HEADER = struct.Struct('<Q')
+INDEX_SIZE = 8
+SINGLE = 0
+ENSEMBLE = 1
+CHECKPOINT = 2
+WRITE_BATCH = 4096
+
+def encode_elements(values):
+    return b''.join([value.to_bytes(ELEMENT_SIZE, 'little') for value in values])
+
+def encode_indices(values):
+    return array('q', values).tobytes()
+
+class BinaryR1CSView:
+    def __init__(self, data, offset):
+        self.data = data
+        (self.num_variables, self.num_public_inputs, self.num_constraints, self.io_size, self.scheme_length,
+         self.num_rows, nnz_a, nnz_b, nnz_c, has_systems, self.num_public_values, self.num_witness_values) = MEMBER_HEADER.unpack_from(data, offset)
+        offset += MEMBER_HEADER.size
+        self.matrix_offsets = []
+        for nnz in [nnz_a, nnz_b, nnz_c]:
+            row_starts = offset
+            offset += INDEX_SIZE * (self.num_rows + 1)
+            indices = offset
+            offset += INDEX_SIZE * nnz
+            systems = None
+            if has_systems:
+                systems = offset
+                offset += INDEX_SIZE * nnz
+            coefficients = offset
+            offset += ELEMENT_SIZE * nnz
+            self.matrix_offsets.append((nnz, row_starts, indices, systems, coefficients))
+        self.public_inputs_offset = offset
+        offset += ELEMENT_SIZE * self.num_public_values
+        self.witness_offset = offset
+        offset += ELEMENT_SIZE * self.num_witness_values
+        self.end = offset
+
+    def __indices(self, offset, count):
+        values = array('q')
+        values.frombytes(self.data[offset:offset + INDEX_SIZE * count])
+        return values
+
+    def __elements(self, offset, start, count):
+        begin = offset + ELEMENT_SIZE * start
+        return [int.from_bytes(self.data[pos:pos + ELEMENT_SIZE], 'little')
+                for pos in range(begin, begin + ELEMENT_SIZE * count, ELEMENT_SIZE)]
+
+    def public_inputs_slice(self, iteration):
+        return self.__elements(self.public_inputs_offset, iteration * self.num_public_inputs, self.num_public_inputs)
+
+    def witness_slice(self, iteration):
+        num_witness_vars = self.num_variables - self.io_size - self.num_public_inputs
+        return self.__elements(self.witness_offset, iteration * num_witness_vars, num_witness_vars)
+
+    def to_r1cs(self):
+        r1cs = R1CS(None)
+        r1cs.num_variables = self.num_variables
+        r1cs.num_public_inputs = self.num_public_inputs
+        r1cs.num_constraints = self.num_constraints
+        r1cs.io_size = self.io_size
+        r1cs.scheme_length = self.scheme_length
+        r1cs.A, r1cs.B, r1cs.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+        for matrix, (nnz, row_starts, indices, systems, coefficients) in zip(r1cs.matrices(), self.matrix_offsets):
+            matrix.set_csr(self.__indices(row_starts, self.num_rows + 1), self.__indices(indices, nnz),
+                           self.__elements(coefficients, 0, nnz), None if systems is None else self.__indices(systems, nnz))
+        r1cs.public_inputs = Witness(PackedElements(self.data, self.public_inputs_offset, self.num_public_values),
+                                     self.num_public_inputs, self.scheme_length)
+        r1cs.witness = Witness(PackedElements(self.data, self.witness_offset, self.num_witness_values),
+                               self.num_variables - self.io_size - self.num_public_inputs, self.scheme_length)
+        return r1cs
+
+class BinaryR1CSFile:
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.kind, num_members = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{filename} is not a binary R1CS file')
+        self.members = []
+        offset = FILE_HEADER.size
+        for _ in range(num_members):
+            self.members.append(BinaryR1CSView(self.data, offset))
+            offset = self.members[-1].end
+        self.state = None
+        if self.kind == CHECKPOINT:
+            size, = STATE_HEADER.unpack_from(self.data, offset)
+            offset += STATE_HEADER.size
+            self.state = json.loads(self.data[offset:offset + size].decode())
+
+    def load(self):
+        if self.kind == ENSEMBLE:
+            return EnsembleR1CS([member.to_r1cs() for member in self.members])
+        return self.members[0].to_r1cs()
+
+def is_binary_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def write_member(f, r1cs):
+    csr = [matrix.csr() for matrix in r1cs.matrices()]
+    has_systems = any([systems is not None for _, _, _, systems in csr])
+    f.write(MEMBER_HEADER.pack(r1cs.num_variables, r1cs.num_public_inputs, r1cs.num_constraints, r1cs.io_size,
+                               r1cs.scheme_length, len(r1cs.A), *[len(indices) for _, indices, _, _ in csr],
+                               int(has_systems), len(r1cs.public_inputs), len(r1cs.witness)))
+    for row_starts, indices, coefficients, systems in csr:
+        f.write(encode_indices(row_starts))
+        f.write(encode_indices(indices))
+        if has_systems:
+            f.write(encode_indices(systems if systems is not None else [-1] * len(indices)))
+        f.write(encode_elements(coefficients))
+    for values in [r1cs.public_inputs, r1cs.witness]:
+        for start in range(0, len(values), WRITE_BATCH):
+            f.write(encode_elements([to_int(el) for el in values[start:start + WRITE_BATCH]]))
+
+def write_r1cs_binary(r1cs, filename):
+    members = r1cs.r1cs_list if hasattr(r1cs, 'r1cs_list') else [r1cs]
+    with open(filename, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, ENSEMBLE if hasattr(r1cs, 'r1cs_list') else SINGLE, len(members)))
+        for member in members:
+            write_member(f, member)
+
+def read_r1cs_binary(filename):
+    return BinaryR1CSFile(filename).load()
+
+def write_checkpoint(r1cs, filename, state: dict):
+    temporary = filename + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, CHECKPOINT, 1))
+        write_member(f, r1cs)
+        encoded = json.dumps(state).encode()
+        f.write(STATE_HEADER.pack(len(encoded)))
+        f.write(encoded)
+    os.replace(temporary, filename)
+
+def read_checkpoint(filename):
+    binary_file = BinaryR1CSFile(filename)
+    if binary_file.kind != CHECKPOINT:
+        raise ValueError(f'{filename} is not a checkpoint')
+    return binary_file.load(), binary_file.state
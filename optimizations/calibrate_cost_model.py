@@ -0,0 +1,38 @@
+from cost_model import NovaCostModel, fit_nova_coefficients
+from binary_format import is_binary_file, read_r1cs_binary
+from single_r1cs import read_r1cs_from_file
+import csv
+import json
+import sys
+
+SAMPLE_KEYS = ['nonzeros', 'num_constraints', 'num_variables', 'io_size', 'scheme_length']
+
+def read_samples(filename):
+    samples = []
+    with open(filename, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            sample = {'seconds': float(row['seconds'])}
+            if row.get('file'):
+                r1cs = read_r1cs_binary(row['file']) if is_binary_file(row['file']) else read_r1cs_from_file(row['file'])
+                sample.update({'nonzeros': sum([matrix.nonzeros() for matrix in r1cs.matrices()]),
+                               'num_constraints': r1cs.num_constraints, 'num_variables': r1cs.num_variables,
+                               'io_size': r1cs.io_size, 'scheme_length': r1cs.scheme_length})
+            else:
+                sample.update({key: int(row[key]) for key in SAMPLE_KEYS})
+            samples.append(sample)
+    return samples
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <target_model_json_path> <timings_csv_path> [<timings_csv_path> ...]")
+        sys.exit(1)
+    samples = []
+    for filename in sys.argv[2:]:
+        samples += read_samples(filename)
+    coefficients = fit_nova_coefficients(samples)
+    model = NovaCostModel(coefficients)
+    for sample in samples:
+        predicted = model.estimate(*[sample[key] for key in SAMPLE_KEYS])
+        print(f"{sample['num_constraints']} constraints, {sample['nonzeros']} non-zeros: {sample['seconds']}s measured, {predicted:.3f}s predicted")
+    with open(sys.argv[1], 'w') as f:
+        json.dump(coefficients, f, indent=2)
@@ -0,0 +1,23 @@
+from binary_format import is_binary_file, read_r1cs_binary
+from single_r1cs import read_r1cs_from_file
+from ensemble_r1cs import read_ensemble_from_file, is_ensemble_json
+from satisfiability import find_unsatisfied
+import sys
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <r1cs_path>")
+        sys.exit(1)
+    if is_binary_file(sys.argv[1]):
+        r1cs = read_r1cs_binary(sys.argv[1])
+    elif is_ensemble_json(sys.argv[1]):
+        r1cs = read_ensemble_from_file(sys.argv[1])
+    else:
+        r1cs = read_r1cs_from_file(sys.argv[1])
+    if hasattr(r1cs, 'r1cs_list'):
+        r1cs = r1cs.to_single_r1cs()
+    failure = find_unsatisfied(r1cs)
+    if failure is not None:
+        print(f'Constraint {failure[1]} is not satisfied at iteration {failure[0]}')
+        sys.exit(1)
+    print('OK')
@@ -0,0 +1,33 @@
+from binary_format import write_checkpoint, read_checkpoint
+from time import perf_counter
+import hashlib
+
+class Checkpointer:
+    def __init__(self, filename, interval=60, state=None):
+        self.filename = filename
+        self.interval = interval
+        self.state = dict() if state is None else state
+        self.steps = self.state.get('steps', 0)
+        self.last_save = perf_counter()
+
+    def step(self, r1cs, position: dict):
+        self.steps += 1
+        if perf_counter() - self.last_save >= self.interval:
+            self.save(r1cs, position)
+
+    def save(self, r1cs, position: dict):
+        self.state.update(position)
+        self.state['steps'] = self.steps
+        write_checkpoint(r1cs, self.filename, self.state)
+        self.last_save = perf_counter()
+
+def load_checkpoint(filename, interval=60):
+    r1cs, state = read_checkpoint(filename)
+    return r1cs, Checkpointer(filename, interval, state)
+
+def input_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,96 @@
+from field_class import inverse
+from consts import MOD
+from heapq import heappush, heappop
+
+class CombinationSearch:
+    def __init__(self, parts: list[dict], num_variables):
+        self.parts = parts
+        self.num_variables = num_variables
+        self.parts_with = [[] for _ in range(num_variables)]
+        for p, part in enumerate(parts):
+            for var in part:
+                self.parts_with[var].append(p)
+        self.w = [0] * num_variables
+        self.w_inv = [0] * num_variables
+        self.support = []
+        self.ratios = dict()
+        self.in_support = dict()
+        self.tops = dict()
+        self.penalized = set()
+        self.local = [0] * num_variables
+        self.heap = [(0, var) for var in range(num_variables)]
+
+    def __height(self, p):
+        zeros = len(self.support) - self.in_support[p]
+        return max(zeros, max(self.ratios[p].values()) - 1)
+
+    def __update_part(self, p):
+        height = self.__height(p)
+        top = sorted([r for r, cnt in self.ratios[p].items() if cnt == height + 1])
+        is_penalized = len(self.support) - self.in_support[p] < height
+        changed = top != self.tops.get(p, []) or is_penalized != (p in self.penalized)
+        self.tops[p] = top
+        if is_penalized:
+            self.penalized.add(p)
+        else:
+            self.penalized.discard(p)
+        return changed
+
+    def __histogram(self, var):
+        histogram = dict()
+        for p in self.parts_with[var]:
+            for r in self.tops.get(p, []):
+                c = self.parts[p][var] * inverse(r) % MOD
+                histogram[c] = histogram.get(c, 0) + 1
+        return histogram
+
+    def __local_gain(self, var):
+        histogram = self.__histogram(var)
+        penalties = sum([1 for p in self.parts_with[var] if p in self.penalized])
+        return penalties + (max(histogram.values()) if len(histogram) > 0 else 0)
+
+    def __candidates(self, var):
+        candidates = set()
+        candidates.add(1)
+        for p in self.parts_with[var]:
+            part = self.parts[p]
+            for j in self.support:
+                if j in part:
+                    candidates.add(self.w[j] * part[var] % MOD * inverse(part[j]) % MOD)
+        return candidates
+
+    def best(self):
+        while len(self.heap) > 0:
+            neg_local, var = self.heap[0]
+            if self.w[var] == 0 and self.local[var] == -neg_local:
+                break
+            heappop(self.heap)
+        if len(self.heap) == 0:
+            return None
+        var = self.heap[0][1]
+        histogram = self.__histogram(var)
+        best_count = max(histogram.values()) if len(histogram) > 0 else 0
+        for c in self.__candidates(var):
+            if histogram.get(c, 0) == best_count:
+                return self.local[var] - len(self.penalized), var, c
+
+    def add(self, var, c):
+        self.w[var] = c
+        self.w_inv[var] = inverse(c)
+        self.support.append(var)
+        self.support.sort()
+        for p in self.parts_with[var]:
+            if p not in self.ratios:
+                self.ratios[p] = dict()
+                self.in_support[p] = 0
+            r = self.parts[p][var] * self.w_inv[var] % MOD
+            self.ratios[p][r] = self.ratios[p].get(r, 0) + 1
+            self.in_support[p] += 1
+        changed = set()
+        for p in self.ratios:
+            if self.__update_part(p):
+                changed.update(self.parts[p])
+        for v in changed:
+            if self.w[v] == 0:
+                self.local[v] = self.__local_gain(v)
+                heappush(self.heap, (-self.local[v], v))
@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left
+
+class ConstraintMatrix:
+    def __init__(self):
+        self.starts = array('l')
+        self.lengths = array('l')
+        self.row_ids = array('l')
+        self.next_row_id = 0
+        self.indices = array('l')
+        self.coefficients = []
+        self.systems = None
+        self.garbage = 0
+        self.column_index = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        matrix = ConstraintMatrix()
+        matrix.starts = array('l', self.starts)
+        matrix.lengths = array('l', self.lengths)
+        matrix.row_ids = array('l', self.row_ids)
+        matrix.next_row_id = self.next_row_id
+        matrix.indices = array('l', self.indices)
+        matrix.coefficients = self.coefficients.copy()
+        matrix.systems = None if self.systems is None else array('l', self.systems)
+        matrix.garbage = self.garbage
+        if self.column_index is not None:
+            matrix.column_index = {var: rows.copy() for var, rows in self.column_index.items()}
+        return matrix
+
+    def nonzeros(self):
+        return sum(self.lengths)
+
+    def row_size(self, row):
+        return self.lengths[row]
+
+    def row(self, row):
+        start = self.starts[row]
+        end = start + self.lengths[row]
+        return self.indices[start:end], self.coefficients[start:end]
+
+    def rows(self):
+        for row in range(len(self.starts)):
+            yield self.row(row)
+
+    def row_items(self, row):
+        start = self.starts[row]
+        end = start + self.lengths[row]
+        if self.systems is None:
+            return list(zip(self.indices[start:end], self.coefficients[start:end]))
+        return [(self.indices[k] if self.systems[k] == -1 else [self.systems[k], self.indices[k]], self.coefficients[k])
+                for k in range(start, end)]
+
+    def __is_own(self, k):
+        return self.systems is None or self.systems[k] == -1
+
+    def __index_row(self, row, sign):
+        if self.column_index is None:
+            return
+        row_id = self.row_ids[row]
+        start = self.starts[row]
+        for k in range(start, start + self.lengths[row]):
+            if not self.__is_own(k):
+                continue
+            rows = self.column_index.setdefault(self.indices[k], dict())
+            rows[row_id] = rows.get(row_id, 0) + sign
+            if rows[row_id] == 0:
+                del rows[row_id]
+                if len(rows) == 0:
+                    del self.column_index[self.indices[k]]
+
+    def __write(self, items):
+        start = len(self.indices)
+        for var, coef in items:
+            if type(var) == int:
+                if self.systems is not None:
+                    self.systems.append(-1)
+                self.indices.append(var)
+            else:
+                if self.systems is None:
+                    self.systems = array('l', [-1]) * len(self.indices)
+                self.systems.append(var[0])
+                self.indices.append(var[1])
+            self.coefficients.append(coef)
+        return start, len(self.indices) - start
+
+    def append_row(self, items):
+        start, length = self.__write(items)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.row_ids.append(self.next_row_id)
+        self.next_row_id += 1
+        self.__index_row(len(self.starts) - 1, 1)
+
+    def set_row(self, row, items):
+        self.__index_row(row, -1)
+        self.garbage += self.lengths[row]
+        self.starts[row], self.lengths[row] = self.__write(items)
+        self.__index_row(row, 1)
+        if self.garbage > len(self.indices) // 2:
+            self.compact()
+
+    def delete_rows(self, rows: set):
+        for row in sorted(rows, reverse=True):
+            self.__index_row(row, -1)
+            self.garbage += self.lengths[row]
+            del self.starts[row]
+            del self.lengths[row]
+            del self.row_ids[row]
+        if self.garbage > len(self.indices) // 2:
+            self.compact()
+
+    def slice(self, rows):
+        matrix = ConstraintMatrix()
+        for row in rows:
+            matrix.append_row(self.row_items(row))
+        return matrix
+
+    def compact(self):
+        indices = array('l')
+        coefficients = []
+        systems = None if self.systems is None else array('l')
+        for row in range(len(self.starts)):
+            start = self.starts[row]
+            end = start + self.lengths[row]
+            self.starts[row] = len(indices)
+            indices.extend(self.indices[start:end])
+            coefficients.extend(self.coefficients[start:end])
+            if systems is not None:
+                systems.extend(self.systems[start:end])
+        self.indices = indices
+        self.coefficients = coefficients
+        self.systems = systems
+        self.garbage = 0
+
+    def csr(self):
+        self.compact()
+        row_starts = array('l', self.starts)
+        row_starts.append(len(self.indices))
+        return row_starts, self.indices, self.coefficients, self.systems
+
+    def set_csr(self, row_starts, indices, coefficients, systems=None):
+        self.starts = array('l', row_starts[:-1])
+        self.lengths = array('l', [row_starts[row + 1] - row_starts[row] for row in range(len(row_starts) - 1)])
+        self.row_ids = array('l', range(len(self.starts)))
+        self.next_row_id = len(self.starts)
+        self.indices = array('l', indices)
+        self.coefficients = coefficients
+        self.systems = None if systems is None else array('l', systems)
+        self.garbage = 0
+        self.column_index = None
+
+    def remap_rows(self, rows, mapping: dict):
+        for row in rows:
+            self.__index_row(row, -1)
+            start = self.starts[row]
+            for k in range(start, start + self.lengths[row]):
+                if self.__is_own(k):
+                    self.indices[k] = mapping.get(self.indices[k], self.indices[k])
+            self.__index_row(row, 1)
+
+    def remap_systems(self, mappings):
+        if self.systems is None:
+            return
+        self.compact()
+        for k in range(len(self.indices)):
+            if self.systems[k] != -1:
+                self.indices[k] = mappings[self.systems[k]][self.indices[k]]
+
+    def build_column_index(self):
+        self.column_index = dict()
+        for row in range(len(self.starts)):
+            self.__index_row(row, 1)
+
+    def position(self, row_id):
+        return bisect_left(self.row_ids, row_id)
+
+    def column(self, var):
+        if self.column_index is None:
+            self.build_column_index()
+        return sorted([self.position(row_id) for row_id in self.column_index.get(var, dict())])
+
+    def is_column_used(self, var):
+        if self.column_index is None:
+            self.build_column_index()
+        return var in self.column_index
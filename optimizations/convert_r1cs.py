@@ -0,0 +1,16 @@
+from binary_format import is_binary_file, read_r1cs_binary, write_r1cs_binary
+from ensemble_r1cs import read_ensemble_from_file, is_ensemble_json
+from single_r1cs import read_r1cs_from_file
+from r1cs_utils import write_r1cs_to_file
+import sys
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <source_path> <target_path>")
+        sys.exit(1)
+    if is_binary_file(sys.argv[1]):
+        write_r1cs_to_file(read_r1cs_binary(sys.argv[1]), sys.argv[2])
+    elif is_ensemble_json(sys.argv[1]):
+        write_r1cs_binary(read_ensemble_from_file(sys.argv[1]), sys.argv[2])
+    else:
+        write_r1cs_binary(read_r1cs_from_file(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,64 @@
+from math import log2, ceil
+import json
+
+NOVA_FEATURES = ['nonzeros', 'padded_constraints', 'padded_variables', 'io_size', 'constant']
+NOVA_DEFAULT_COEFFICIENTS = {'nonzeros': 1, 'padded_constraints': 2, 'padded_variables': 2, 'io_size': 64, 'constant': 0}
+
+def next_power_of_two(value):
+    return 1 if value <= 1 else 1 << (value - 1).bit_length()
+
+class CostModel:
+    def estimate(self, nonzero_coefs, num_constraints, num_variables, io_size, scheme_length):
+        return nonzero_coefs + (num_constraints * ceil(log2(num_constraints)) if num_constraints > 0 else 0)
+
+class NovaCostModel(CostModel):
+    def __init__(self, coefficients=None):
+        self.coefficients = NOVA_DEFAULT_COEFFICIENTS.copy()
+        if coefficients is not None:
+            self.coefficients.update(coefficients)
+
+    def estimate(self, nonzero_coefs, num_constraints, num_variables, io_size, scheme_length):
+        features = nova_features(nonzero_coefs, num_constraints, num_variables, io_size)
+        return scheme_length * sum([self.coefficients[name] * value for name, value in zip(NOVA_FEATURES, features)])
+
+def nova_features(nonzero_coefs, num_constraints, num_variables, io_size):
+    return [nonzero_coefs, next_power_of_two(num_constraints), next_power_of_two(num_variables), io_size, 1]
+
+def load_cost_model(name):
+    if name == 'default':
+        return CostModel()
+    if name == 'nova':
+        return NovaCostModel()
+    with open(name, 'r') as f:
+        return NovaCostModel(json.load(f))
+
+def solve_least_squares(rows, targets, active):
+    size = len(active)
+    matrix = [[sum([row[i] * row[j] for row in rows]) for j in active] + [sum([row[i] * t for row, t in zip(rows, targets)])]
+              for i in active]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(matrix[r][col]))
+        if matrix[pivot][col] == 0:
+            continue
+        matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+        for r in range(size):
+            if r != col and matrix[r][col] != 0:
+                factor = matrix[r][col] / matrix[col][col]
+                matrix[r] = [a - factor * b for a, b in zip(matrix[r], matrix[col])]
+    return [matrix[k][size] / matrix[k][k] if matrix[k][k] != 0 else 0 for k in range(size)]
+
+def fit_nova_coefficients(samples):
+    rows = [[sample['scheme_length'] * value for value in
+             nova_features(sample['nonzeros'], sample['num_constraints'], sample['num_variables'], sample['io_size'])]
+            for sample in samples]
+    targets = [sample['seconds'] for sample in samples]
+    active = list(range(len(NOVA_FEATURES)))
+    while True:
+        solution = solve_least_squares(rows, targets, active)
+        negative = [k for k, value in zip(active, solution) if value < 0]
+        if len(negative) == 0:
+            break
+        active = [k for k in active if k not in negative]
+    coefficients = {name: 0 for name in NOVA_FEATURES}
+    coefficients.update({NOVA_FEATURES[k]: value for k, value in zip(active, solution)})
+    return coefficients
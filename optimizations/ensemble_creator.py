@@ -6,6 +6,7 @@ from single_r1cs import R1CS, R1CS_constraint, R1CS_term
 from r1cs_utils import write_r1cs_to_file
 from r1cs_creator import *
 from ensemble_r1cs import EnsembleR1CS
+from witness_evaluator import WitnessEvaluator
 from random import randint
 
 def create_independent_ensemble():
@@ -37,16 +38,6 @@ def random_part_ensemble(r1cs_1: R1CS, r1cs: R1CS, max_var_num=None, k_not_zeros
             term.variable = (0, min(max(term.variable, r1cs_1.io_size), r1cs_1.num_variables - 1))
     return part
 
-def calc_left_ensemble(r1cs_1, r1cs: R1CS, constraint_ind, iter, io):
-    num_witness_variables = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
-    cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * iter:r1cs.num_public_inputs * (iter + 1)] + r1cs.witness[num_witness_variables * iter:num_witness_variables * (iter + 1)]
-    num_witness_variables_1 = r1cs_1.num_variables - r1cs_1.io_size - r1cs_1.num_public_inputs
-    cur_vars_1 = io + r1cs_1.public_inputs[r1cs_1.num_public_inputs * iter:r1cs_1.num_public_inputs * (iter + 1)] + r1cs_1.witness[num_witness_variables_1 * iter:num_witness_variables_1 * (iter + 1)]
-
-    calc_A = sum([(cur_vars[term.variable] if type(term.variable) == int else cur_vars_1[term.variable[1]]) * term.coefficient for term in r1cs.constraints[constraint_ind].A])
-    calc_B = sum([(cur_vars[term.variable] if type(term.variable) == int else cur_vars_1[term.variable[1]]) * term.coefficient for term in r1cs.constraints[constraint_ind].B])
-    return calc_A * calc_B
-
 def create_dependent_ensemble():
     r1cs_1 = create_with_extra_variables(num_variables=20, num_vital_constraints=5, num_additional_constraints=3)
 
@@ -70,12 +61,10 @@ def create_dependent_ensemble():
         constraint.C = [R1CS_term((var, 1))]
         mapping_index_var.append((len(r1cs.constraints), var - r1cs.io_size - r1cs.num_public_inputs))
         r1cs.constraints.append(constraint)
-    io = [Field(0) for _ in range(r1cs.io_size)]
+    evaluator = WitnessEvaluator(r1cs, [WitnessEvaluator(r1cs_1)])
     for i in range(r1cs.scheme_length):
         for index, var in mapping_index_var:
-            r1cs.witness[i * num_witness_variables + var] = calc_left_ensemble(r1cs_1, r1cs, index, i, io)
-        cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * i:r1cs.num_public_inputs * (i + 1)] + r1cs.witness[num_witness_variables * i:num_witness_variables * (i + 1)]
-        io = cur_vars[len(cur_vars) - r1cs.io_size:len(cur_vars)]
+            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, evaluator, index, i)
 
     r1cs.num_constraints = len(r1cs.constraints)
 
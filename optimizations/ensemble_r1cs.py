@@ -1,5 +1,10 @@
-from single_r1cs import R1CS
-from copy import deepcopy
+from single_r1cs import R1CS, read_r1cs
+from json_stream import JsonStream
+from constraint_matrix import ConstraintMatrix
+from witness_storage import Witness, as_witness
+from witness_evaluator import WitnessEvaluator
+from parallel import parallel_map
+from array import array
 
 
 class EnsembleR1CS:
@@ -8,7 +13,7 @@ class EnsembleR1CS:
             self.r1cs_list = None
             return
         assert (type(ensemble_json) == list)
-        self.r1cs_list = [R1CS(r1cs_json) for r1cs_json in ensemble_json]
+        self.r1cs_list = [r1cs_json if type(r1cs_json) == R1CS else R1CS(r1cs_json) for r1cs_json in ensemble_json]
         for r1cs in self.r1cs_list:
             assert (r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs >= r1cs.io_size)
         assert (min([r1cs.scheme_length for r1cs in self.r1cs_list]) == max(
@@ -17,6 +22,26 @@ class EnsembleR1CS:
     def to_json_format(self):
         return [r1cs.to_json_format() for r1cs in self.r1cs_list]
 
+    def __variables_mapping(self):
+        io_sizes = [r1cs.io_size for r1cs in self.r1cs_list]
+        public_sizes = [r1cs.num_public_inputs for r1cs in self.r1cs_list]
+        hidden_sizes = [r1cs.num_variables - 2 * r1cs.io_size - r1cs.num_public_inputs for r1cs in self.r1cs_list]
+        io_offset = 0
+        public_offset = sum(io_sizes)
+        hidden_offset = public_offset + sum(public_sizes)
+        output_offset = hidden_offset + sum(hidden_sizes)
+        mapping = []
+        for io_size, public_size, hidden_size in zip(io_sizes, public_sizes, hidden_sizes):
+            mapping.append(list(range(io_offset, io_offset + io_size)) +
+                           list(range(public_offset, public_offset + public_size)) +
+                           list(range(hidden_offset, hidden_offset + hidden_size)) +
+                           list(range(output_offset, output_offset + io_size)))
+            io_offset += io_size
+            public_offset += public_size
+            hidden_offset += hidden_size
+            output_offset += io_size
+        return mapping
+
     def to_single_r1cs(self):
         large_r1cs = R1CS(None)
         large_r1cs.num_variables = sum([r1cs.num_variables for r1cs in self.r1cs_list])
@@ -24,68 +49,104 @@ class EnsembleR1CS:
         large_r1cs.num_public_inputs = sum([r1cs.num_public_inputs for r1cs in self.r1cs_list])
         large_r1cs.scheme_length = self.r1cs_list[0].scheme_length
 
-        vars_mapping = dict()
-        next_var = 0
-        for r1cs_ind in range(len(self.r1cs_list)):
-            r1cs = self.r1cs_list[r1cs_ind]
-            for i in range(r1cs.io_size):
-                vars_mapping[(r1cs_ind, i)] = next_var
-                next_var += 1
-        for r1cs_ind in range(len(self.r1cs_list)):
-            r1cs = self.r1cs_list[r1cs_ind]
-            for i in range(r1cs.io_size, r1cs.io_size + r1cs.num_public_inputs):
-                vars_mapping[(r1cs_ind, i)] = next_var
-                next_var += 1
-        for r1cs_ind in range(len(self.r1cs_list)):
-            r1cs = self.r1cs_list[r1cs_ind]
-            for i in range(r1cs.io_size + r1cs.num_public_inputs, r1cs.num_variables - r1cs.io_size):
-                vars_mapping[(r1cs_ind, i)] = next_var
-                next_var += 1
-        for r1cs_ind in range(len(self.r1cs_list)):
-            r1cs = self.r1cs_list[r1cs_ind]
-            for i in range(r1cs.num_variables - r1cs.io_size, r1cs.num_variables):
-                vars_mapping[(r1cs_ind, i)] = next_var
-                next_var += 1
+        mapping = self.__variables_mapping()
+        large_r1cs.A, large_r1cs.B, large_r1cs.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+        for k, large_matrix in enumerate(large_r1cs.matrices()):
+            row_starts, indices, coefficients = array('l', [0]), array('l'), []
+            for r1cs_ind, r1cs in enumerate(self.r1cs_list):
+                member_starts, member_indices, member_coefficients, member_systems = r1cs.matrices()[k].csr()
+                own_mapping = mapping[r1cs_ind]
+                if member_systems is None:
+                    indices.extend([own_mapping[var] for var in member_indices])
+                else:
+                    indices.extend([own_mapping[var] if system == -1 else mapping[system][var]
+                                    for system, var in zip(member_systems, member_indices)])
+                offset = row_starts[-1]
+                row_starts.extend([offset + start for start in member_starts[1:]])
+                coefficients.extend(member_coefficients)
+            large_matrix.set_csr(row_starts, indices, coefficients)
+        large_r1cs.num_constraints = len(large_r1cs.A)
 
-        assert (next_var == large_r1cs.num_variables)
+        members = []
+        for r1cs in self.r1cs_list:
+            witness_width = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
+            members.append((as_witness(r1cs.public_inputs, r1cs.num_public_inputs, r1cs.scheme_length),
+                            as_witness(r1cs.witness, witness_width, r1cs.scheme_length), witness_width - r1cs.io_size))
+        public_inputs = []
+        witness = []
+        for iteration in range(large_r1cs.scheme_length):
+            outputs = []
+            for member_public_inputs, member_witness, hidden_size in members:
+                public_inputs.extend(member_public_inputs.row(iteration))
+                row = member_witness.row(iteration)
+                witness.extend(row[:hidden_size])
+                outputs.extend(row[hidden_size:])
+            witness.extend(outputs)
+        large_r1cs.public_inputs = Witness(public_inputs, large_r1cs.num_public_inputs, large_r1cs.scheme_length)
+        large_r1cs.witness = Witness(witness, large_r1cs.num_variables - large_r1cs.io_size - large_r1cs.num_public_inputs,
+                                     large_r1cs.scheme_length)
+        return large_r1cs
 
-        large_r1cs.constraints = []
-        for r1cs_ind in range(len(self.r1cs_list)):
-            r1cs = self.r1cs_list[r1cs_ind]
-            for constraint in r1cs.constraints:
-                new_constraint = deepcopy(constraint)
-                for part in [new_constraint.A, new_constraint.B, new_constraint.C]:
-                    for term in part:
-                        system_index = r1cs_ind if type(term.variable) == int else term.variable[0]
-                        var = term.variable if type(term.variable) == int else term.variable[1]
-                        term.variable = vars_mapping[(system_index, var)]
-                large_r1cs.constraints.append(new_constraint)
-        large_r1cs.num_constraints = len(large_r1cs.constraints)
+    def __foreign_references(self):
+        references = [set() for _ in self.r1cs_list]
+        for r1cs, member_references in zip(self.r1cs_list, references):
+            for matrix in r1cs.matrices():
+                _, indices, _, systems = matrix.csr()
+                if systems is not None:
+                    member_references.update([(system, var) for system, var in zip(systems, indices) if system != -1])
+        return references
 
-        num_witness_vars = large_r1cs.num_variables - large_r1cs.io_size - large_r1cs.num_public_inputs
+    def optimize_members(self, workers=1, check=False, cost_model=None):
+        references = self.__foreign_references()
+        for member_references in references:
+            for system, var in member_references:
+                self.r1cs_list[system].pin_variables([var])
+        columns = [{(system, var): WitnessEvaluator(self.r1cs_list[system]).column(var) for system, var in member_references}
+                   for member_references in references]
+        for r1cs, member_columns in zip(self.r1cs_list, columns):
+            r1cs.localize_foreign_variables(member_columns)
 
-        large_r1cs.public_inputs = [None for _ in range(large_r1cs.num_public_inputs * large_r1cs.scheme_length)]
-        large_r1cs.witness = [None for _ in range(num_witness_vars * large_r1cs.scheme_length)]
+        def optimize(r1cs):
+            r1cs.full_optimize(check=check, cost_model=cost_model)
+            r1cs.public_inputs = None
+            if isinstance(r1cs.witness, Witness):
+                r1cs.witness.source = None
+            else:
+                r1cs.witness = None
+            return r1cs
 
-        for iteration in range(large_r1cs.scheme_length):
-            for r1cs_index in range(len(self.r1cs_list)):
-                r1cs = self.r1cs_list[r1cs_index]
-                for var in range(r1cs.num_variables):
-                    if var < r1cs.io_size:
-                        pass
-                    elif var < r1cs.io_size + r1cs.num_public_inputs:
-                        large_r1cs.public_inputs[large_r1cs.num_public_inputs * iteration + vars_mapping[
-                            (r1cs_index, var)] - large_r1cs.io_size] = r1cs.public_inputs[
-                            iteration * r1cs.num_public_inputs + var - r1cs.io_size]
-                    else:
-                        cur_witness_vars_num = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
-                        large_r1cs.witness[num_witness_vars * iteration + vars_mapping[
-                            (r1cs_index, var)] - large_r1cs.io_size - large_r1cs.num_public_inputs] = r1cs.witness[
-                            iteration * cur_witness_vars_num + var - r1cs.io_size - r1cs.num_public_inputs]
+        sources = [(r1cs.public_inputs, r1cs.witness, r1cs.witness.source if isinstance(r1cs.witness, Witness) else r1cs.witness)
+                   for r1cs in self.r1cs_list]
+        self.r1cs_list = parallel_map(optimize, self.r1cs_list, workers)
+        for r1cs, (public_inputs, witness, source) in zip(self.r1cs_list, sources):
+            r1cs.public_inputs = public_inputs
+            if r1cs.witness is None:
+                r1cs.witness = witness
+            else:
+                r1cs.witness.source = source
+        for r1cs, member_references in zip(self.r1cs_list, references):
+            r1cs.restore_foreign_variables(member_references)
+        for r1cs in self.r1cs_list:
+            for matrix in r1cs.matrices():
+                matrix.remap_systems([member.pinned for member in self.r1cs_list])
+        for r1cs in self.r1cs_list:
+            r1cs.pinned = dict()
 
-        for el in large_r1cs.witness:
-            assert (el is not None)
-        for el in large_r1cs.public_inputs:
-            assert (el is not None)
+    def optimize(self, workers=1, check=False, final_pass=False, cost_model=None):
+        self.optimize_members(workers, check, cost_model)
+        r1cs = self.to_single_r1cs()
+        if final_pass:
+            r1cs.full_optimize(workers, check, cost_model=cost_model)
+        return r1cs
 
-        return large_r1cs
+def read_ensemble_from_file(filename):
+    with open(filename, 'r') as f:
+        stream = JsonStream(f)
+        return EnsembleR1CS([read_r1cs(stream) for _ in stream.iter_array()])
+
+def is_ensemble_json(filename):
+    with open(filename, 'r') as f:
+        while True:
+            char = f.read(1)
+            if not char.isspace():
+                return char == '['
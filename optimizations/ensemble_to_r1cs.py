@@ -1,12 +1,33 @@
 from r1cs_utils import write_r1cs_to_file
-from ensemble_r1cs import EnsembleR1CS
+from ensemble_r1cs import read_ensemble_from_file
+from cost_model import load_cost_model
 import sys
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <source_ensemble_json_path> <target_single_r1cs_json_path>")
+    args = sys.argv[1:]
+    workers = 1
+    flags = dict()
+    for flag in ['--compact', '--optimize', '--final-pass', '--check']:
+        flags[flag] = flag in args
+        if flags[flag]:
+            args.remove(flag)
+    cost_model = None
+    if '--cost-model' in args:
+        pos = args.index('--cost-model')
+        cost_model = load_cost_model(args[pos + 1])
+        del args[pos:pos + 2]
+    if '--jobs' in args:
+        pos = args.index('--jobs')
+        workers = int(args[pos + 1])
+        del args[pos:pos + 2]
+    if len(args) < 2:
+        print(f"Usage: {sys.argv[0]} [--optimize [--final-pass] [--jobs <workers>] [--cost-model <default|nova|model_json_path>] [--check]] [--compact] <source_ensemble_json_path> <target_single_r1cs_json_path>")
         sys.exit(1)
-    r1cs_json = eval(open(sys.argv[1], 'r').read())
-    ensemble = EnsembleR1CS(r1cs_json)
-    r1cs = ensemble.to_single_r1cs()
-    write_r1cs_to_file(r1cs, sys.argv[2])
+    ensemble = read_ensemble_from_file(args[0])
+    if flags['--optimize']:
+        old_time_estimation = ensemble.to_single_r1cs().time_estimation(cost_model)
+        r1cs = ensemble.optimize(workers, flags['--check'], flags['--final-pass'], cost_model)
+        print(f'Difficulty estimation: {old_time_estimation}->{r1cs.time_estimation(cost_model)}')
+    else:
+        r1cs = ensemble.to_single_r1cs()
+    write_r1cs_to_file(r1cs, args[1], flags['--compact'])
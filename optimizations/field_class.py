@@ -1,8 +1,24 @@
 from consts import MOD
 
+def inverse(x: int):
+    return pow(x, -1, MOD)
+
+def batch_inverse(values: list[int]):
+    prefix = [1] * (len(values) + 1)
+    for i, value in enumerate(values):
+        prefix[i + 1] = prefix[i] * value % MOD
+    inv = inverse(prefix[-1])
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = inv * prefix[i] % MOD
+        inv = inv * values[i] % MOD
+    return result
+
 class Field:
+    __slots__ = ('x',)
+
     def __init__(self, x):
-        self.x = int(x) % MOD
+        self.x = x % MOD if type(x) == int else int(x) % MOD
 
     def __add__(self, other):
         if isinstance(other, Field):
@@ -14,6 +30,9 @@ class Field:
             return Field(self.x - other.x)
         return Field(self.x - other)
 
+    def __rsub__(self, other):
+        return Field(other - self.x)
+
     def __mul__(self, other):
         if isinstance(other, Field):
             return Field(self.x * other.x)
@@ -24,17 +43,22 @@ class Field:
 
     def __truediv__(self, other):
         if isinstance(other, Field):
-            return self * other.inverse()
-        return self * Field(other).inverse()
+            return Field(self.x * inverse(other.x))
+        return Field(self.x * inverse(other % MOD))
 
     def inverse(self):
-        return self ** (MOD - 2)
+        return Field(inverse(self.x))
 
     def __eq__(self, other):
         if isinstance(other, Field):
             return self.x == other.x
+        if other == 0:
+            return self.x == 0
         return self.x == (other % MOD)
 
+    def __int__(self):
+        return self.x
+
     def __neg__(self):
         return Field(-self.x)
 
@@ -42,5 +66,4 @@ class Field:
         return f"Field({self.x})"
 
     __radd__ = __add__
-    __rsub__ = __sub__
     __rmul__ = __mul__
@@ -0,0 +1,136 @@
+import json
+import re
+
+CHUNK_SIZE = 1 << 20
+
+TOKEN = re.compile(r'\s*(?:("(?:[^"\\]|\\.)*")|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|([{}\[\]:,])|(true|false|null))')
+SCALAR_ITEM = re.compile(r'\s*"([^"\\]*)"\s*([,\]])')
+LITERALS = {'true': True, 'false': False, 'null': None}
+NUMBER_CONTINUATION = '.eE+-0123456789'
+
+class JsonStream:
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.lookahead = None
+
+    def __read_more(self):
+        chunk = self.file.read(self.chunk_size)
+        if len(chunk) == 0:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def __is_complete(self, match):
+        if self.eof:
+            return True
+        if match.end() == len(self.buffer):
+            return False
+        return match.group(2) is None or self.buffer[match.end()] not in NUMBER_CONTINUATION
+
+    def __next_token(self):
+        while True:
+            match = TOKEN.match(self.buffer, self.pos)
+            if match is not None and self.__is_complete(match):
+                break
+            if self.eof:
+                if self.buffer[self.pos:].strip() != '':
+                    raise ValueError(f'Invalid JSON near {self.buffer[self.pos:self.pos + 20]!r}')
+                return None
+            self.__read_more()
+        self.pos = match.end()
+        string, number, punctuation, literal = match.groups()
+        if string is not None:
+            return ('value', string[1:-1] if '\\' not in string else json.loads(string))
+        if number is not None:
+            return ('value', int(number) if number.lstrip('-').isdigit() else float(number))
+        if literal is not None:
+            return ('value', LITERALS[literal])
+        return (punctuation, None)
+
+    def __match_ahead(self, pattern):
+        while True:
+            match = pattern.match(self.buffer, self.pos)
+            if match is not None and (match.end() < len(self.buffer) or self.eof):
+                return match
+            if match is None and (self.eof or len(self.buffer) - self.pos >= self.chunk_size):
+                return None
+            self.__read_more()
+
+    def peek(self):
+        if self.lookahead is None:
+            self.lookahead = self.__next_token()
+            if self.lookahead is None:
+                raise ValueError('Unexpected end of JSON')
+        return self.lookahead[0]
+
+    def next(self):
+        self.peek()
+        token, self.lookahead = self.lookahead, None
+        return token
+
+    def expect(self, kind):
+        token = self.next()
+        if token[0] != kind:
+            raise ValueError(f'Expected {kind!r} in JSON, got {token[0]!r}')
+        return token[1]
+
+    def iter_array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.next()
+            return
+        while True:
+            yield
+            kind = self.next()[0]
+            if kind == ']':
+                return
+            if kind != ',':
+                raise ValueError(f"Expected ',' in JSON, got {kind!r}")
+
+    def iter_values(self):
+        self.expect('[')
+        first = True
+        while True:
+            match = self.__match_ahead(SCALAR_ITEM)
+            if match is None:
+                if first and self.peek() == ']':
+                    self.next()
+                    return
+                value = self.expect('value')
+                kind = self.next()[0]
+                if kind not in [',', ']']:
+                    raise ValueError(f"Expected ',' in JSON, got {kind!r}")
+            else:
+                self.pos = match.end()
+                value, kind = match.groups()
+            first = False
+            yield value
+            if kind == ']':
+                return
+
+    def iter_object(self):
+        self.expect('{')
+        if self.peek() == '}':
+            self.next()
+            return
+        while True:
+            key = self.expect('value')
+            self.expect(':')
+            yield key
+            kind = self.next()[0]
+            if kind == '}':
+                return
+            if kind != ',':
+                raise ValueError(f"Expected ',' in JSON, got {kind!r}")
+
+    def read_value(self):
+        kind = self.peek()
+        if kind == '[':
+            return [self.read_value() for _ in self.iter_array()]
+        if kind == '{':
+            return {key: self.read_value() for key in self.iter_object()}
+        return self.expect('value')
@@ -1,37 +1,171 @@
-from field_class import Field
-
-def gauss(vectors: list[list[Field]]):
-    n = len(vectors)
-    m = len(vectors[0])
-    row = 0
-    for col in range(m):
-        if row >= n:
-            break
-        for i in range(row, n):
-            if vectors[i][col] != 0:
-                vectors[i], vectors[row] = vectors[row], vectors[i]
+from field_class import inverse
+from consts import MOD
+from heapq import heappush, heappop
+
+MARKOWITZ_SEARCH_ROWS = 3
+
+def to_int_vector(vector: dict):
+    result = dict()
+    for key, value in vector.items():
+        value = int(value) % MOD
+        if value != 0:
+            result[key] = value
+    return result
+
+def add_sparse_vector(vector: dict, other: dict, coef: int):
+    for key, value in other.items():
+        new_value = (vector.get(key, 0) + coef * value) % MOD
+        if new_value == 0:
+            vector.pop(key, None)
+        else:
+            vector[key] = new_value
+    return vector
+
+class SparseGauss:
+    def __init__(self, vectors: list[dict], track_combinations=False):
+        self.basis = []
+        self.pivot_position = dict()
+        self.dependencies = []
+        rows = [to_int_vector(vector) for vector in vectors]
+        combinations = [{ind: 1} for ind in range(len(rows))] if track_combinations else None
+        column_rows = dict()
+        row_heap = []
+        for ind, row in enumerate(rows):
+            for key in row:
+                column_rows.setdefault(key, set()).add(ind)
+            heappush(row_heap, (len(row), ind))
+        active = set(range(len(rows)))
+
+        while len(active) > 0:
+            candidates = []
+            while len(row_heap) > 0 and len(candidates) < MARKOWITZ_SEARCH_ROWS:
+                length, ind = heappop(row_heap)
+                if ind not in active or len(rows[ind]) != length or ind in candidates:
+                    continue
+                if length == 0:
+                    active.remove(ind)
+                    if track_combinations:
+                        self.dependencies.append(combinations[ind])
+                    continue
+                candidates.append(ind)
+            if len(candidates) == 0:
                 break
-        if vectors[row][col] == 0:
-            continue
-        for i in range(n):
-            if i != row and vectors[i][col]:
-                val = vectors[i][col] / vectors[row][col]
-                for j in range(col, m):
-                    vectors[i][j] -= val * vectors[row][j]
-        row += 1
-    return vectors
-
-def check_vector_in_hull(vectors, vector_for_check):
-    vectors = gauss(vectors)
-    n = len(vectors)
-    m = len(vectors[0])
-    for i in range(n):
-        row = 0
-        while row < m and vectors[i][row] == 0:
-            row += 1
-        if row == m:
+            best = None
+            for ind in candidates:
+                for key in rows[ind]:
+                    cost = (len(rows[ind]) - 1) * (len(column_rows[key]) - 1)
+                    if best is None or cost < best[0]:
+                        best = (cost, ind, key)
+            for ind in candidates:
+                if ind != best[1]:
+                    heappush(row_heap, (len(rows[ind]), ind))
+            _, pivot_ind, pivot = best
+
+            pivot_row = rows[pivot_ind]
+            inv = inverse(pivot_row[pivot])
+            for key in pivot_row:
+                pivot_row[key] = pivot_row[key] * inv % MOD
+                column_rows[key].discard(pivot_ind)
+            pivot_combination = None
+            if track_combinations:
+                pivot_combination = combinations[pivot_ind]
+                for key in pivot_combination:
+                    pivot_combination[key] = pivot_combination[key] * inv % MOD
+            active.remove(pivot_ind)
+
+            for ind in list(column_rows[pivot]):
+                row = rows[ind]
+                coef = MOD - row[pivot]
+                for key, value in pivot_row.items():
+                    new_value = (row.get(key, 0) + coef * value) % MOD
+                    if new_value == 0:
+                        if key in row:
+                            del row[key]
+                            column_rows[key].discard(ind)
+                    else:
+                        if key not in row:
+                            column_rows[key].add(ind)
+                        row[key] = new_value
+                if track_combinations:
+                    add_sparse_vector(combinations[ind], pivot_combination, coef)
+                heappush(row_heap, (len(row), ind))
+
+            self.pivot_position[pivot] = len(self.basis)
+            self.basis.append((pivot, pivot_row))
+
+    def rank(self):
+        return len(self.basis)
+
+    def reduce(self, vector: dict):
+        vector = to_int_vector(vector)
+        heap = [self.pivot_position[key] for key in vector if key in self.pivot_position]
+        heap.sort()
+        while len(heap) > 0:
+            position = heappop(heap)
+            pivot, row = self.basis[position]
+            if pivot not in vector:
+                continue
+            coef = MOD - vector[pivot]
+            for key, value in row.items():
+                new_value = (vector.get(key, 0) + coef * value) % MOD
+                if new_value == 0:
+                    vector.pop(key, None)
+                else:
+                    if key not in vector and key in self.pivot_position:
+                        heappush(heap, self.pivot_position[key])
+                    vector[key] = new_value
+        return vector
+
+    def contains(self, vector: dict):
+        return len(self.reduce(vector)) == 0
+
+def check_vector_in_hull(vectors: list[dict], vector_for_check: dict):
+    return SparseGauss(vectors).contains(vector_for_check)
+
+def check_vectors_in_hull(vectors: list[dict], vectors_for_check: list[dict]):
+    basis = SparseGauss(vectors)
+    return [basis.contains(vector) for vector in vectors_for_check]
+
+def dense_dependencies(rows: list[list[int]]):
+    pivots = []
+    dependencies = []
+    for ind, row in enumerate(rows):
+        combination = {ind: 1}
+        for column, pivot_row, pivot_combination in pivots:
+            coef = row[column]
+            if coef != 0:
+                row = [(value - coef * pivot_value) % MOD for value, pivot_value in zip(row, pivot_row)]
+                add_sparse_vector(combination, pivot_combination, MOD - coef)
+        column = next((column for column, value in enumerate(row) if value != 0), None)
+        if column is None:
+            dependencies.append(combination)
             continue
-        val = vector_for_check[row] / vectors[i][row]
-        for j in range(m):
-            vector_for_check[j] -= vectors[i][j] * val
-    return vector_for_check == [0] * m
\ No newline at end of file
+        inv = inverse(row[column])
+        pivots.append((column, [value * inv % MOD for value in row], {key: value * inv % MOD for key, value in combination.items()}))
+    return dependencies
+
+class LinearDependencies:
+    def __init__(self, vectors: list, indices=None, dense=False):
+        if dense:
+            self.dependencies = dense_dependencies(vectors)
+        else:
+            self.dependencies = SparseGauss(vectors, track_combinations=True).dependencies
+        if indices is not None:
+            indices = list(indices)
+            self.dependencies = [{indices[ind]: coef for ind, coef in dependency.items()} for dependency in self.dependencies]
+
+    def dependent_indices(self):
+        indices = set()
+        for dependency in self.dependencies:
+            indices.update(dependency)
+        return indices
+
+    def delete(self, ind):
+        containing = [dependency for dependency in self.dependencies if ind in dependency]
+        if len(containing) == 0:
+            return
+        pivot = min(containing, key=len)
+        self.dependencies = [dependency for dependency in self.dependencies if dependency is not pivot]
+        for dependency in self.dependencies:
+            if ind in dependency:
+                add_sparse_vector(dependency, pivot, MOD - dependency[ind] * inverse(pivot[ind]) % MOD)
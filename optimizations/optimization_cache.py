@@ -0,0 +1,90 @@
+from single_r1cs import R1CS
+from binary_format import write_checkpoint, read_checkpoint, encode_indices, encode_elements
+from witness_evaluator import WitnessEvaluator
+from witness_storage import Witness, as_witness
+import hashlib
+import json
+import os
+import struct
+
+DEFAULT_MAX_SIZE = 1 << 30
+ENTRY_SUFFIX = '.r1cs'
+
+def options_key(**options):
+    def encode(value):
+        return {'model': type(value).__name__, 'coefficients': getattr(value, 'coefficients', None)}
+    return json.dumps(options, sort_keys=True, default=encode)
+
+def structure_key(r1cs, options=''):
+    digest = hashlib.sha256()
+    digest.update(struct.pack('<3Q', r1cs.num_variables, r1cs.num_public_inputs, r1cs.io_size))
+    digest.update(options.encode())
+    for matrix in r1cs.matrices():
+        row_starts, indices, coefficients, systems = matrix.csr()
+        digest.update(encode_indices(row_starts))
+        digest.update(encode_indices(indices))
+        digest.update(encode_elements(coefficients))
+        if systems is not None:
+            digest.update(encode_indices(systems))
+    return digest.hexdigest()
+
+def replay(r1cs, structure, origins):
+    first_witness_var = r1cs.io_size + r1cs.num_public_inputs
+    evaluator = WitnessEvaluator(r1cs)
+    source = as_witness(r1cs.witness, r1cs.num_variables - first_witness_var, r1cs.scheme_length)
+    witness = Witness(source.source, source.source_width, r1cs.scheme_length)
+    witness.select_columns([])
+    for origin in origins:
+        if len(origin) == 1 and origin[0][1] == 1 and origin[0][0] >= first_witness_var:
+            witness.append_columns(source, [origin[0][0] - first_witness_var])
+        else:
+            witness.insert_column(witness.width(), evaluator.combination_column(origin))
+    structure.scheme_length = r1cs.scheme_length
+    structure.public_inputs = r1cs.public_inputs
+    structure.witness = witness
+    return structure
+
+class OptimizationCache:
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def load(self, key, r1cs):
+        path = self.__path(key)
+        if not os.path.exists(path):
+            return None
+        structure, state = read_checkpoint(path)
+        os.utime(path)
+        return replay(r1cs, structure, state['origins'])
+
+    def store(self, key, r1cs):
+        first_witness_var = r1cs.io_size + r1cs.num_public_inputs
+        structure = R1CS(None)
+        structure.num_variables = r1cs.num_variables
+        structure.num_public_inputs = r1cs.num_public_inputs
+        structure.num_constraints = r1cs.num_constraints
+        structure.io_size = r1cs.io_size
+        structure.scheme_length = 0
+        structure.A, structure.B, structure.C = r1cs.A, r1cs.B, r1cs.C
+        structure.public_inputs = []
+        structure.witness = []
+        origins = [sorted(origin.items()) for origin in r1cs.origins[first_witness_var:]]
+        write_checkpoint(structure, self.__path(key), {'origins': origins})
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        total = sum([size for _, size, _ in entries])
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
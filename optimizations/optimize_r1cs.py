@@ -1,15 +1,116 @@
 from r1cs_utils import write_r1cs_to_file
-from single_r1cs import R1CS
+from single_r1cs import read_r1cs_from_file
+from binary_format import is_binary_file, read_r1cs_binary
+from cost_model import load_cost_model
+from pass_manager import PassManager, DEFAULT_PIPELINE
+from checkpoint import Checkpointer, load_checkpoint, input_digest
+from optimization_cache import OptimizationCache, options_key, structure_key
+import os
 import sys
 
+def pop_option(args, name, convert):
+    if name not in args:
+        return None
+    pos = args.index(name)
+    value = convert(args[pos + 1])
+    del args[pos:pos + 2]
+    return value
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <source_json_path> <target_json_path>")
+    args = sys.argv[1:]
+    compact = '--compact' in args
+    if compact:
+        args.remove('--compact')
+    check = '--check' in args
+    if check:
+        args.remove('--check')
+    sweep = '--sweep' in args
+    if sweep:
+        args.remove('--sweep')
+    components = '--components' in args
+    if components:
+        args.remove('--components')
+    resume = '--resume' in args
+    if resume:
+        args.remove('--resume')
+    cost_model = pop_option(args, '--cost-model', load_cost_model)
+    workers = pop_option(args, '--jobs', int) or 1
+    pipeline = pop_option(args, '--pipeline', lambda value: value.split(','))
+    time_budget = pop_option(args, '--time-budget', float)
+    max_rounds = pop_option(args, '--max-rounds', int)
+    min_rate = pop_option(args, '--min-rate', float)
+    checkpoint = pop_option(args, '--checkpoint', str)
+    checkpoint_interval = pop_option(args, '--checkpoint-interval', float)
+    cache_directory = pop_option(args, '--cache', str)
+    cache_size = pop_option(args, '--cache-size', float)
+    if len(args) < 2:
+        print(f"Usage: {sys.argv[0]} [--jobs <workers>] [--cost-model <default|nova|model_json_path>] [--compact] [--check] [--components] [--sweep] "
+              f"[--pipeline <pass,...>] [--time-budget <seconds>] [--max-rounds <rounds>] [--min-rate <cost_per_second>] "
+              f"[--checkpoint <path>] [--checkpoint-interval <seconds>] [--resume] "
+              f"[--cache <directory>] [--cache-size <megabytes>] <source_json_path> <target_json_path>")
+        sys.exit(1)
+    if checkpoint is None and (resume or checkpoint_interval is not None):
+        checkpoint = args[1] + '.checkpoint'
+    if (checkpoint is not None or cache_directory is not None) and components:
+        print('Checkpoints and the cache are not supported together with --components')
         sys.exit(1)
-    r1cs_json = eval(open(sys.argv[1], 'r').read())
-    r1cs = R1CS(r1cs_json)
-    old_time_estimation = r1cs.time_estimation()
-    r1cs.full_optimize()
-    new_time_estimation = r1cs.time_estimation()
+    checkpoint_interval = 60 if checkpoint_interval is None else checkpoint_interval
+    manager = None
+    if any([value is not None for value in [pipeline, time_budget, max_rounds, min_rate]]):
+        if pipeline is None and sweep:
+            pipeline = ['sweep_variables' if name == 'variables' else name for name in DEFAULT_PIPELINE]
+        manager = PassManager(pipeline, time_budget, max_rounds, min_rate, workers, check, cost_model)
+    mode = 'full_optimize' if manager is None else 'pass_manager'
+    options = options_key(mode=mode, sweep=sweep, cost_model=cost_model, pipeline=pipeline, max_rounds=max_rounds, min_rate=min_rate)
+    state = None
+    if resume and os.path.exists(checkpoint):
+        r1cs, checkpointer = load_checkpoint(checkpoint, checkpoint_interval)
+        state = checkpointer.state
+        if state['mode'] != mode:
+            print(f"Checkpoint {checkpoint} was written by {state['mode']}, not {mode}")
+            sys.exit(1)
+        if state.get('input') != input_digest(args[0]):
+            print(f"Checkpoint {checkpoint} was written for a different input than {args[0]}")
+            sys.exit(1)
+        if state.get('options') != options:
+            print(f"Checkpoint {checkpoint} was written with different options: {state.get('options')}")
+            sys.exit(1)
+        print(f"Resuming from {checkpoint} after {state['steps']} steps")
+    else:
+        r1cs = read_r1cs_binary(args[0]) if is_binary_file(args[0]) else read_r1cs_from_file(args[0])
+        checkpointer = None
+        if checkpoint is not None:
+            checkpointer = Checkpointer(checkpoint, checkpoint_interval, {'mode': mode, 'input': input_digest(args[0]), 'options': options,
+                                                                          'initial_estimation': r1cs.time_estimation(cost_model)})
+    old_time_estimation = r1cs.time_estimation(cost_model) if checkpointer is None else checkpointer.state['initial_estimation']
+    if manager is not None:
+        manager.checkpointer = checkpointer
+    cache = None
+    cached = None
+    if cache_directory is not None and state is None:
+        cache = OptimizationCache(cache_directory) if cache_size is None else OptimizationCache(cache_directory, int(cache_size * (1 << 20)))
+        key = structure_key(r1cs, options_key(mode=mode, sweep=sweep, cost_model=cost_model, pipeline=pipeline, time_budget=time_budget,
+                                              max_rounds=max_rounds, min_rate=min_rate))
+        cached = cache.load(key, r1cs)
+        if cached is None:
+            r1cs.track_origins()
+    if cached is not None:
+        print(f'Cache hit {key}')
+        r1cs = cached
+        if check:
+            r1cs.check_satisfiability('cache replay')
+    elif components:
+        r1cs.optimize_components(workers, check, sweep, cost_model, manager)
+    elif manager is not None:
+        r1cs = manager.run(r1cs, state)
+        for rounds, name, old_cost, new_cost, seconds in manager.history:
+            print(f'Round {rounds}, {name}: {old_cost}->{new_cost} in {seconds:.2f}s')
+    else:
+        r1cs.full_optimize(workers, check, sweep, cost_model, checkpointer, 0 if state is None else state['pass'])
+    if cache is not None and cached is None and (manager is None or not manager.truncated):
+        cache.store(key, r1cs)
+    new_time_estimation = r1cs.time_estimation(cost_model)
     print(f'Difficulty estimation: {old_time_estimation}->{new_time_estimation}')
-    write_r1cs_to_file(r1cs, sys.argv[2])
+    write_r1cs_to_file(r1cs, args[1], compact)
+    if checkpointer is not None:
+        os.remove(checkpoint)
@@ -0,0 +1,21 @@
+from multiprocessing import get_context, get_all_start_methods, current_process
+
+_task = None
+SUBSTITUTION_ITEMS_PER_WORKER = 1024
+CONSTRAINT_ITEMS_PER_WORKER = 256
+
+def _call(item):
+    return _task(item)
+
+def parallel_map(func, items, workers=1, min_items_per_worker=1):
+    global _task
+    items = list(items)
+    workers = min(workers, len(items) // max(min_items_per_worker, 1))
+    if workers <= 1 or 'fork' not in get_all_start_methods() or current_process().daemon:
+        return [func(item) for item in items]
+    _task = func
+    try:
+        with get_context('fork').Pool(workers) as pool:
+            return pool.map(_call, items)
+    finally:
+        _task = None
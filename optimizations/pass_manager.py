@@ -0,0 +1,81 @@
+from copy import deepcopy
+from time import perf_counter
+
+PASSES = {
+    'constraints': lambda r1cs, manager, on_step: r1cs.reduce_constraints(False, manager.workers, manager.should_stop, on_step),
+    'probabilistic_constraints': lambda r1cs, manager, on_step: r1cs.reduce_constraints(True, manager.workers, manager.should_stop, on_step),
+    'variables': lambda r1cs, manager, on_step: r1cs.reduce_variables(manager.workers, False, manager.cost_model, manager.should_stop, on_step),
+    'sweep_variables': lambda r1cs, manager, on_step: r1cs.reduce_variables(manager.workers, True, manager.cost_model, manager.should_stop, on_step),
+    'coefficients': lambda r1cs, manager, on_step: r1cs.reduce_nonzero_coefficients(manager.cost_model, manager.should_stop, on_step),
+}
+DEFAULT_PIPELINE = ['constraints', 'variables', 'coefficients']
+NESTED_CONSTRAINT_PASSES = ['variables', 'sweep_variables']
+
+class PassManager:
+    def __init__(self, pipeline=None, time_budget=None, max_rounds=None, min_rate=None, workers=1, check=False, cost_model=None, checkpointer=None):
+        self.pipeline = DEFAULT_PIPELINE if pipeline is None else pipeline
+        for name in self.pipeline:
+            if name not in PASSES:
+                raise ValueError(f'Unknown pass {name}, expected one of: {", ".join(PASSES)}')
+        self.time_budget = time_budget
+        self.max_rounds = max_rounds
+        self.min_rate = min_rate
+        self.workers = workers
+        self.check = check
+        self.cost_model = cost_model
+        self.checkpointer = checkpointer
+        self.deadline = None
+        self.history = []
+        self.truncated = False
+
+    def should_stop(self):
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            self.truncated = True
+        return self.truncated
+
+    def __on_step(self, position):
+        if self.checkpointer is None:
+            return None
+        return lambda r1cs: self.checkpointer.step(r1cs, position)
+
+    def run(self, r1cs, state=None):
+        self.deadline = None if self.time_budget is None else perf_counter() + self.time_budget
+        self.truncated = False
+        best = r1cs
+        best_cost = r1cs.time_estimation(self.cost_model)
+        rounds = 0 if state is None else state['round']
+        first_pass = 0 if state is None else state['pass']
+        round_cost = best_cost if state is None else state['round_cost']
+        in_pass = state is not None and state.get('in_pass', False)
+        try:
+            while self.max_rounds is None or rounds < self.max_rounds:
+                round_start = perf_counter()
+                for index in range(first_pass, len(self.pipeline)):
+                    name = self.pipeline[index]
+                    if self.should_stop():
+                        return best
+                    current = deepcopy(best)
+                    pass_start = perf_counter()
+                    if in_pass and name in NESTED_CONSTRAINT_PASSES:
+                        current.reduce_constraints(workers=self.workers, should_stop=self.should_stop)
+                    in_pass = False
+                    PASSES[name](current, self, self.__on_step({'round': rounds, 'pass': index, 'round_cost': round_cost, 'in_pass': True}))
+                    if self.check:
+                        current.check_satisfiability(name)
+                    cost = current.time_estimation(self.cost_model)
+                    self.history.append((rounds, name, best_cost, cost, perf_counter() - pass_start))
+                    if cost <= best_cost:
+                        best, best_cost = current, cost
+                    if self.checkpointer is not None:
+                        self.checkpointer.save(best, {'round': rounds, 'pass': index + 1, 'round_cost': round_cost, 'in_pass': False})
+                first_pass = 0
+                rounds += 1
+                if best_cost >= round_cost:
+                    break
+                if self.min_rate is not None and (round_cost - best_cost) / max(perf_counter() - round_start, 1e-9) < self.min_rate:
+                    self.truncated = True
+                    break
+                round_cost = best_cost
+        except KeyboardInterrupt:
+            self.truncated = True
+        return best
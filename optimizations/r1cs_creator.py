@@ -3,6 +3,7 @@ import random
 from field_class import Field
 from consts import MOD
 from single_r1cs import R1CS, R1CS_constraint, R1CS_term
+from witness_evaluator import WitnessEvaluator
 from r1cs_utils import write_r1cs_to_file
 from random import randint
 
@@ -36,12 +37,8 @@ def random_linear_combination(r1cs: R1CS, part_AB1, part_AB2, part_C1, part_C2):
     vec_C = [vec_C1[i] * c1 + vec_C2[i] * c2 for i in range(r1cs.num_variables)]
     return r1cs.vector_to_constraint_part(vec_AB), r1cs.vector_to_constraint_part(vec_C)
 
-def calc_left(r1cs: R1CS, constraint_ind, iter, io):
-    num_witness_variables = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
-    cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * iter:r1cs.num_public_inputs * (iter + 1)] + r1cs.witness[num_witness_variables * iter:num_witness_variables * (iter + 1)]
-    calc_A = sum([cur_vars[term.variable] * term.coefficient for term in r1cs.constraints[constraint_ind].A])
-    calc_B = sum([cur_vars[term.variable] * term.coefficient for term in r1cs.constraints[constraint_ind].B])
-    return calc_A * calc_B
+def calc_left(r1cs: R1CS, evaluator: WitnessEvaluator, constraint_ind, iter):
+    return Field(evaluator.product(iter, r1cs.A.row_items(constraint_ind), r1cs.B.row_items(constraint_ind)))
 
 
 def create_with_extra_constraints(scheme_length=10, io_size=2, num_public_inputs=2, num_variables=30, num_vital_constraints=5, num_additional_constraints=20, k_not_zeros=4):
@@ -66,12 +63,10 @@ def create_with_extra_constraints(scheme_length=10, io_size=2, num_public_inputs
         constraint.C = [R1CS_term((var, 1))]
         mapping_index_var.append((len(r1cs.constraints), var - r1cs.io_size - r1cs.num_public_inputs))
         r1cs.constraints.append(constraint)
-    io = [Field(0) for _ in range(r1cs.io_size)]
+    evaluator = WitnessEvaluator(r1cs)
     for i in range(r1cs.scheme_length):
         for index, var in mapping_index_var:
-            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, index, i, io)
-        cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * i:r1cs.num_public_inputs * (i + 1)] + r1cs.witness[num_witness_variables * i:num_witness_variables * (i + 1)]
-        io = cur_vars[len(cur_vars) - r1cs.io_size:len(cur_vars)]
+            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, evaluator, index, i)
 
     for _ in range(num_additional_constraints):
         i = random.randint(0, len(r1cs.constraints) - 1)
@@ -114,12 +109,10 @@ def create_with_extra_variables(scheme_length=10, io_size=2, num_public_inputs=2
         constraint.C = [R1CS_term((var, 1))]
         mapping_index_var.append((len(r1cs.constraints), var - r1cs.io_size - r1cs.num_public_inputs))
         r1cs.constraints.append(constraint)
-    io = [Field(0) for _ in range(r1cs.io_size)]
+    evaluator = WitnessEvaluator(r1cs)
     for i in range(r1cs.scheme_length):
         for index, var in mapping_index_var:
-            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, index, i, io)
-        cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * i:r1cs.num_public_inputs * (i + 1)] + r1cs.witness[num_witness_variables * i:num_witness_variables * (i + 1)]
-        io = cur_vars[len(cur_vars) - r1cs.io_size:len(cur_vars)]
+            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, evaluator, index, i)
 
     r1cs.num_constraints = len(r1cs.constraints)
     return r1cs
@@ -145,12 +138,10 @@ def create_for_new_vars_optimization(scheme_length=10, io_size=2, num_public_inp
         constraint.C = [R1CS_term((var, 1))]
         mapping_index_var.append((len(r1cs.constraints), var - r1cs.io_size - r1cs.num_public_inputs))
         r1cs.constraints.append(constraint)
-    io = [Field(0) for _ in range(r1cs.io_size)]
+    evaluator = WitnessEvaluator(r1cs)
     for i in range(r1cs.scheme_length):
         for index, var in mapping_index_var:
-            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, index, i, io)
-        cur_vars = io + r1cs.public_inputs[r1cs.num_public_inputs * i:r1cs.num_public_inputs * (i + 1)] + r1cs.witness[num_witness_variables * i:num_witness_variables * (i + 1)]
-        io = cur_vars[len(cur_vars) - r1cs.io_size:len(cur_vars)]
+            r1cs.witness[i * num_witness_variables + var] = calc_left(r1cs, evaluator, index, i)
 
     r1cs.num_constraints = len(r1cs.constraints)
     return r1cs
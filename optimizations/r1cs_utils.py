@@ -1,5 +1,55 @@
 import json
 
-def write_r1cs_to_file(r1cs, filename):
+WRITE_BATCH = 4096
+HEADER_KEYS = ['num_variables', 'num_public_inputs', 'num_constraints', 'io_size', 'scheme_length']
+
+def encode_json(value, compact, prefix):
+    if compact:
+        return json.dumps(value, separators=(',', ':'))
+    return json.dumps(value, indent=2).replace('\n', '\n' + prefix)
+
+def write_json_array(f, items, encode, compact, prefix):
+    inner = prefix if compact else prefix + '  '
+    newline = '' if compact else '\n'
+    chunk = []
+    is_empty = True
+    for item in items:
+        chunk.append(('[' if is_empty else ',') + newline + inner + encode(item, inner))
+        is_empty = False
+        if len(chunk) >= WRITE_BATCH:
+            f.write(''.join(chunk))
+            chunk = []
+    chunk.append('[]' if is_empty else newline + prefix + ']')
+    f.write(''.join(chunk))
+
+def constraint_to_json_format(r1cs, ind):
+    return {name: [{'variable': var, 'coefficient': str(coef)} for var, coef in matrix.row_items(ind)]
+            for matrix, name in zip(r1cs.matrices(), ['A', 'B', 'C'])}
+
+def write_r1cs(f, r1cs, compact=False, prefix=''):
+    inner = prefix if compact else prefix + '  '
+    newline = '' if compact else '\n'
+    separator = ':' if compact else ': '
+    f.write('{' + newline)
+    for key in HEADER_KEYS:
+        f.write(f'{inner}"{key}"{separator}{json.dumps(getattr(r1cs, key))},{newline}')
+    f.write(f'{inner}"constraints"{separator}')
+    write_json_array(f, range(len(r1cs.A)), lambda ind, item_prefix: encode_json(constraint_to_json_format(r1cs, ind), compact, item_prefix),
+                     compact, inner)
+    for key in ['public_inputs', 'witness']:
+        f.write(f',{newline}{inner}"{key}"{separator}')
+        write_json_array(f, getattr(r1cs, key), lambda el, _: '"' + str(el.x) + '"', compact, inner)
+    f.write(newline + prefix + '}')
+
+def write_r1cs_to_file(r1cs, filename, compact=False):
     with open(filename, 'w') as f:
-        f.write(json.dumps(r1cs.to_json_format(), indent=2))
+        if not hasattr(r1cs, 'r1cs_list'):
+            write_r1cs(f, r1cs, compact)
+            return
+        newline = '' if compact else '\n'
+        inner = '' if compact else '  '
+        f.write('[')
+        for ind, member in enumerate(r1cs.r1cs_list):
+            f.write((',' if ind > 0 else '') + newline + inner)
+            write_r1cs(f, member, compact, inner)
+        f.write(newline + ']' if len(r1cs.r1cs_list) > 0 else ']')
@@ -0,0 +1,20 @@
+from witness_evaluator import WitnessEvaluator
+
+CHECK_BLOCK = 1024
+
+def find_unsatisfied(r1cs, block=CHECK_BLOCK):
+    evaluator = WitnessEvaluator(r1cs)
+    for start in range(0, r1cs.scheme_length, block):
+        stop = min(r1cs.scheme_length, start + block)
+        columns = dict()
+        first = None
+        for ind in range(len(r1cs.A)):
+            left = evaluator.product_column(r1cs.A.row_items(ind), r1cs.B.row_items(ind), start, stop, columns)
+            right = evaluator.combination_column(r1cs.C.row_items(ind), start, stop, columns)
+            for t in range(stop - start if first is None else first[0]):
+                if left[t] != right[t]:
+                    first = (t, ind)
+                    break
+        if first is not None:
+            return start + first[0], first[1]
+    return None
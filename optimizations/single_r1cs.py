@@ -1,8 +1,22 @@
-from linear_algebra import check_vector_in_hull
-from field_class import Field
+from linear_algebra import LinearDependencies, add_sparse_vector, check_vector_in_hull
+from constraint_matrix import ConstraintMatrix
+from combination_search import CombinationSearch
+from consts import MOD
+from field_class import Field, batch_inverse
 from r1cs_utils import write_r1cs_to_file
+from parallel import parallel_map, SUBSTITUTION_ITEMS_PER_WORKER, CONSTRAINT_ITEMS_PER_WORKER
+from json_stream import JsonStream
+from witness_evaluator import WitnessEvaluator
+from satisfiability import find_unsatisfied
+from witness_storage import Witness, PackedElements, as_witness, pack_element
 from copy import deepcopy
-from math import log2, ceil
+from array import array
+from cost_model import CostModel
+from random import randint, Random
+
+PROJECTION_EXTRA_POINTS = 16
+PROJECTION_BLOCK_POINTS = 64
+DEFAULT_COST_MODEL = CostModel()
 
 def get_r1cs_statistics(r1cs):
     variables = r1cs['num_variables']
@@ -22,25 +36,65 @@ class R1CS_term:
     def to_json_format(self):
         return {"variable": self.variable, "coefficient": str(self.coefficient.x)}
 
+def terms_to_items(part: list[R1CS_term]):
+    return [(term.variable, term.coefficient.x) for term in part]
+
 class R1CS_constraint:
-    def __init__(self, constraint):
+    def __init__(self, constraint, matrices=None, index=None):
+        self.matrices = matrices
+        self.index = index
         if constraint is None:
-            self.A = None
-            self.B = None
-            self.C = None
+            self.parts = [None, None, None]
             return
-        self.A = [R1CS_term(term) for term in constraint['A']]
-        self.B = [R1CS_term(term) for term in constraint['B']]
-        self.C = [R1CS_term(term) for term in constraint['C']]
+        self.parts = [[R1CS_term(term) for term in constraint[name]] for name in ['A', 'B', 'C']]
+
+    def __get_part(self, k):
+        if self.matrices is None:
+            return self.parts[k]
+        return [R1CS_term(item) for item in self.matrices[k].row_items(self.index)]
+
+    def __set_part(self, k, part):
+        if self.matrices is None:
+            self.parts[k] = part
+        else:
+            self.matrices[k].set_row(self.index, terms_to_items(part))
+
+    A = property(lambda self: self.__get_part(0), lambda self, part: self.__set_part(0, part))
+    B = property(lambda self: self.__get_part(1), lambda self, part: self.__set_part(1, part))
+    C = property(lambda self: self.__get_part(2), lambda self, part: self.__set_part(2, part))
 
     def size(self):
-        return len(self.A) + len(self.B) + len(self.C)
+        if self.matrices is None:
+            return len(self.A) + len(self.B) + len(self.C)
+        return sum([matrix.row_size(self.index) for matrix in self.matrices])
 
     def to_json_format(self):
         return {'A': [term.to_json_format() for term in self.A],
                 'B': [term.to_json_format() for term in self.B],
                 'C': [term.to_json_format() for term in self.C]}
 
+class R1CS_constraints:
+    def __init__(self, r1cs):
+        self.r1cs = r1cs
+
+    def __len__(self):
+        return len(self.r1cs.A)
+
+    def __getitem__(self, ind):
+        if ind < 0:
+            ind += len(self)
+        if not 0 <= ind < len(self):
+            raise IndexError(ind)
+        return R1CS_constraint(None, self.r1cs.matrices(), ind)
+
+    def __iter__(self):
+        for ind in range(len(self)):
+            yield self[ind]
+
+    def append(self, constraint: R1CS_constraint):
+        for matrix, part in zip(self.r1cs.matrices(), [constraint.A, constraint.B, constraint.C]):
+            matrix.append_row(terms_to_items(part))
+
 class R1CS:
     def __init__(self, r1cs_json):
         if r1cs_json is None:
@@ -52,34 +106,69 @@ class R1CS:
             self.constraints = None
             self.public_inputs = None
             self.witness = None
-            self.mapping = None
+            self.pinned = dict()
+            self.origins = None
             return
         self.num_variables = r1cs_json['num_variables']
         self.num_public_inputs = r1cs_json['num_public_inputs']
         self.num_constraints = r1cs_json['num_constraints']
         self.io_size = r1cs_json['io_size']
         self.scheme_length = r1cs_json['scheme_length']
-        self.constraints = [R1CS_constraint(constraint) for constraint in r1cs_json['constraints']]
-        self.public_inputs = [Field(el) for el in r1cs_json['public_inputs']]
+        self.A, self.B, self.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+        for constraint in r1cs_json['constraints']:
+            for matrix, name in zip(self.matrices(), ['A', 'B', 'C']):
+                matrix.append_row([(term['variable'], int(term['coefficient']) % MOD) for term in constraint[name]])
+        self.public_inputs = Witness(r1cs_json['public_inputs'], self.num_public_inputs, self.scheme_length)
         for i in range(self.scheme_length):
             assert(self.public_inputs[i * self.num_public_inputs] == 1)
-        self.witness = [Field(el) for el in r1cs_json['witness']]
-        self.mapping = None
+        self.witness = Witness(r1cs_json['witness'], self.__witness_width(), self.scheme_length)
+        self.pinned = dict()
+        self.origins = None
+
+    def matrices(self):
+        return [self.A, self.B, self.C]
+
+    @property
+    def constraints(self):
+        return None if self.A is None else R1CS_constraints(self)
+
+    @constraints.setter
+    def constraints(self, constraints: list[R1CS_constraint] | None):
+        if constraints is None:
+            self.A, self.B, self.C = None, None, None
+            return
+        self.A, self.B, self.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+        for constraint in constraints:
+            self.constraints.append(constraint)
+
+    def __witness_width(self):
+        return self.num_variables - self.io_size - self.num_public_inputs
+
+    def __use_witness_storage(self):
+        self.public_inputs = as_witness(self.public_inputs, self.num_public_inputs, self.scheme_length)
+        self.witness = as_witness(self.witness, self.__witness_width(), self.scheme_length)
 
     def __is_variable_1(self, variable):
         return variable == self.io_size
 
-    def __is_constraint_part_1(self, part: list[R1CS_term]):
-        return len(part) == 1 and self.__is_variable_1(part[0].variable)
+    def __is_row_1(self, matrix: ConstraintMatrix, ind):
+        return matrix.row_size(ind) == 1 and self.__is_variable_1(matrix.row(ind)[0][0])
 
     def __is_hidden_variable(self, variable):
         return self.io_size + self.num_public_inputs <= variable < self.num_variables - self.io_size
 
     def __nonzero_coefs(self):
-        return sum([sum([len(part) for part in [constraint.A, constraint.B, constraint.C]]) for constraint in self.constraints])
+        return sum([matrix.nonzeros() for matrix in self.matrices()])
+
+    def __constraint_size(self, ind):
+        return sum([matrix.row_size(ind) for matrix in self.matrices()])
 
-    def time_estimation(self):
-        return self.__nonzero_coefs() + self.num_constraints * ceil(log2(self.num_constraints))
+    def __estimation(self, nonzero_coefs, num_constraints, num_variables, cost_model=None):
+        cost_model = DEFAULT_COST_MODEL if cost_model is None else cost_model
+        return cost_model.estimate(nonzero_coefs, num_constraints, num_variables, self.io_size, self.scheme_length)
+
+    def time_estimation(self, cost_model=None):
+        return self.__estimation(self.__nonzero_coefs(), self.num_constraints, self.num_variables, cost_model)
 
     def to_json_format(self):
         return {
@@ -88,55 +177,47 @@ class R1CS:
             'num_constraints': self.num_constraints,
             'io_size': self.io_size,
             'scheme_length': self.scheme_length,
-            'constraints': [constraint.to_json_format() for constraint in self.constraints],
+            'constraints': [{name: [{'variable': var, 'coefficient': str(coef)} for var, coef in matrix.row_items(ind)]
+                             for matrix, name in zip(self.matrices(), ['A', 'B', 'C'])} for ind in range(len(self.A))],
             'public_inputs': [str(el.x) for el in self.public_inputs],
             'witness': [str(el.x) for el in self.witness]
         }
 
-    def __create_mapping(self):
-        next_ind = self.num_variables
-        self.mapping = [[0] * self.num_variables for _ in range(self.num_variables)]
-        for i in range(self.num_variables):
-            for j in range(i, self.num_variables):
-                self.mapping[i][j] = self.mapping[j][i] = next_ind
-                next_ind += 1
-
-    def __constraint_to_vector(self, constraint: R1CS_constraint):
-        if self.mapping is None:
-            self.__create_mapping()
-        vector = [Field(0)] * (self.num_variables + self.num_variables * (self.num_variables + 1) // 2)
-        for term1 in constraint.A:
-            for term2 in constraint.B:
-                if self.__is_variable_1(term1.variable):
-                    vector[term2.variable] += term1.coefficient * term2.coefficient
-                elif self.__is_variable_1(term2.variable):
-                    vector[term1.variable] += term1.coefficient * term2.coefficient
+    def __constraint_to_vector(self, ind):
+        vector = dict()
+        a_vars, a_coefs = self.A.row(ind)
+        b_vars, b_coefs = self.B.row(ind)
+        for var1, coef1 in zip(a_vars, a_coefs):
+            for var2, coef2 in zip(b_vars, b_coefs):
+                if self.__is_variable_1(var1):
+                    key = var2
+                elif self.__is_variable_1(var2):
+                    key = var1
                 else:
-                    vector[self.mapping[term1.variable][term2.variable]] += term1.coefficient * term2.coefficient
-        for term3 in constraint.C:
-            vector[term3.variable] -= term3.coefficient
-        return vector
-
-    def __check_constraint_necessity(self, constraint_ind):
-        assert(0 <= constraint_ind < len(self.constraints))
-        if len(self.constraints) == 1:
-            return True
-        set_of_constraints = self.constraints[:constraint_ind] + self.constraints[constraint_ind + 1:]
-        constraint_for_check = self.constraints[constraint_ind]
-        vectors = [self.__constraint_to_vector(constraint) for constraint in set_of_constraints]
-        vector_for_check = self.__constraint_to_vector(constraint_for_check)
-        return not check_vector_in_hull(vectors, vector_for_check)
-
-    def __delete_constraint(self, constraint_ind):
-        self.constraints = self.constraints[:constraint_ind] + self.constraints[constraint_ind + 1:]
-        self.num_constraints = len(self.constraints)
+                    key = (min(var1, var2), max(var1, var2))
+                vector[key] = vector.get(key, 0) + coef1 * coef2
+        for var, coef in zip(*self.C.row(ind)):
+            vector[var] = vector.get(var, 0) - coef
+        vector = {key: value % MOD for key, value in vector.items()}
+        return {key: value for key, value in vector.items() if value != 0}
+
+    def __delete_constraints(self, constraint_inds: set):
+        for matrix in self.matrices():
+            matrix.delete_rows(constraint_inds)
+        self.num_constraints = len(self.A)
 
     def constraint_part_to_vector(self, constraint_part: list[R1CS_term]):
-        vector = [Field(0)] * self.num_variables
+        vector = [0] * self.num_variables
         for term in constraint_part:
-            vector[term.variable] += term.coefficient
+            vector[term.variable] = (vector[term.variable] + term.coefficient.x) % MOD
         return vector
 
+    def __row_to_sparse_vector(self, matrix: ConstraintMatrix, ind):
+        vector = dict()
+        for var, coef in zip(*matrix.row(ind)):
+            vector[var] = (vector.get(var, 0) + coef) % MOD
+        return {var: coef for var, coef in vector.items() if coef != 0}
+
     def vector_to_constraint_part(self, vector):
         assert(len(vector) == self.num_variables)
         part = []
@@ -145,232 +226,546 @@ class R1CS:
                 part.append(R1CS_term((var, vector[var])))
         return part
 
-    def __substitute_in_constraint_part(self, part: list[R1CS_term], variable, lc):
-        vector = [Field(0)] * self.num_variables
-        for term in part:
-            if term.variable == variable:
-                for j in range(self.num_variables):
-                    vector[j] += lc[j] * term.coefficient
+    def sparse_vector_to_constraint_part(self, vector: dict):
+        return [R1CS_term((var, vector[var])) for var in sorted(vector) if vector[var] != 0]
+
+    def __vector_to_items(self, vector: list[int]):
+        return [(var, vector[var]) for var in range(self.num_variables) if vector[var] != 0]
+
+    def __substitute_in_row(self, matrix: ConstraintMatrix, ind, variable, lc: dict):
+        vector = dict()
+        for var, coef in zip(*matrix.row(ind)):
+            if var == variable:
+                for lc_var, value in lc.items():
+                    vector[lc_var] = (vector.get(lc_var, 0) + value * coef) % MOD
             else:
-                vector[term.variable] += term.coefficient
-        return self.vector_to_constraint_part(vector)
-
-    def __substitute(self, variable, lc):
-        r1cs_copy = deepcopy(self)
-        for i in range(len(r1cs_copy.constraints)):
-            r1cs_copy.constraints[i].A = r1cs_copy.__substitute_in_constraint_part(r1cs_copy.constraints[i].A, variable, lc)
-            r1cs_copy.constraints[i].B = r1cs_copy.__substitute_in_constraint_part(r1cs_copy.constraints[i].B, variable, lc)
-            r1cs_copy.constraints[i].C = r1cs_copy.__substitute_in_constraint_part(r1cs_copy.constraints[i].C, variable, lc)
-        # r1cs_copy.reduce_constraints()
-        return r1cs_copy
+                vector[var] = (vector.get(var, 0) + coef) % MOD
+        return [(var, vector[var]) for var in sorted(vector) if vector[var] != 0]
+
+    def occurrences(self, variable):
+        return [(ind, k) for k, matrix in enumerate(self.matrices()) for ind in matrix.column(variable)]
+
+    def __build_occurrence_index(self):
+        for matrix in self.matrices():
+            if matrix.column_index is None:
+                matrix.build_column_index()
+
+    def __substitution_delta(self, variable, lc: dict, constraint_ind):
+        delta = -self.__constraint_size(constraint_ind)
+        for ind, k in self.occurrences(variable):
+            if ind != constraint_ind:
+                matrix = self.matrices()[k]
+                delta += len(self.__substitute_in_row(matrix, ind, variable, lc)) - matrix.row_size(ind)
+        return delta
+
+    def __substitute(self, variable, lc: dict, constraint_ind):
+        for ind, k in self.occurrences(variable):
+            if ind != constraint_ind:
+                matrix = self.matrices()[k]
+                matrix.set_row(ind, self.__substitute_in_row(matrix, ind, variable, lc))
+        self.__delete_constraints({constraint_ind})
+
+    def __remap_variables(self, mapping: dict):
+        for matrix in self.matrices():
+            rows = set()
+            for var in mapping:
+                rows.update(matrix.column(var))
+            matrix.remap_rows(rows, mapping)
+        self.pinned = {key: mapping.get(var, var) for key, var in self.pinned.items()}
 
     def __delete_unused_hidden_variables(self):
-        cnt_vars_used = [0] * self.num_variables
-        for constraint in self.constraints:
-            for part in [constraint.A, constraint.B, constraint.C]:
-                for term in part:
-                    cnt_vars_used[term.variable] += 1
-
         next_var = 0
         mapping_old_vars_to_new_vars = [-1] * self.num_variables
+        pinned = set(self.pinned.values())
         for var in range(self.num_variables):
-            if cnt_vars_used[var] == 0 and self.__is_hidden_variable(var):
+            if self.__is_hidden_variable(var) and var not in pinned and not any([matrix.is_column_used(var) for matrix in self.matrices()]):
                 pass
             else:
                 mapping_old_vars_to_new_vars[var] = next_var
                 next_var += 1
 
-        new_witness = []
-        for i in range(len(self.witness)):
-            var = i % (self.num_variables - self.io_size - self.num_public_inputs) + self.io_size + self.num_public_inputs
-            if mapping_old_vars_to_new_vars[var] != -1:
-                new_witness.append(self.witness[i])
-        self.witness = new_witness
-
-        for constraint in self.constraints:
-            for part in [constraint.A, constraint.B, constraint.C]:
-                for term in part:
-                    term.variable = mapping_old_vars_to_new_vars[term.variable]
-        self.num_variables = next_var
+        self.__use_witness_storage()
+        first_witness_var = self.io_size + self.num_public_inputs
+        self.witness.select_columns([var - first_witness_var for var in range(first_witness_var, self.num_variables)
+                                     if mapping_old_vars_to_new_vars[var] != -1])
 
-        self.__create_mapping()
+        self.__remap_variables({var: new_var for var, new_var in enumerate(mapping_old_vars_to_new_vars)
+                                if new_var != -1 and new_var != var})
+        if self.origins is not None:
+            self.origins = [origin for var, origin in enumerate(self.origins) if mapping_old_vars_to_new_vars[var] != -1]
+        self.num_variables = next_var
 
-    def __reduce_variables_step(self):
-        linear_combination: list[None | list] = [None] * self.num_variables
+    def __reduce_variables_step(self, workers=1, cost_model=None):
+        linear_combination: list[None | dict] = [None] * self.num_variables
         constraint_index_for_lc = [-1] * self.num_variables
-        for i in range(len(self.constraints)):
-            if self.__is_constraint_part_1(self.constraints[i].A) or self.__is_constraint_part_1(self.constraints[i].B):
-                lc = self.__constraint_to_vector(self.constraints[i])[:self.num_variables]
-                for var in range(self.num_variables):
-                    if lc[var] != 0:
-                        constraint_index_for_lc[var] = i
-                        linear_combination[var] = lc.copy()
-                        coef = -Field(1) / lc[var]
-                        linear_combination[var][var] = Field(0)
-                        for j in range(self.num_variables):
-                            linear_combination[var][j] *= coef
-
-        possible_r1cs = [(deepcopy(self), -1)]
-        for var in range(self.num_variables):
-            if self.__is_hidden_variable(var) and linear_combination[var] is not None:
-                r1cs_subst = self.__substitute(var, linear_combination[var])
-                r1cs_subst.__delete_constraint(constraint_index_for_lc[var])
-                possible_r1cs.append((r1cs_subst, var))
-        best_r1cs, var = min(possible_r1cs, key=lambda x: x[0].time_estimation())
-        self.__dict__.update(best_r1cs.__dict__)
-        return var != -1
-
-    def __calc_zeros_new_variable_in_constraint_part(self, part_vec: list[Field], w: list[Field]):
+        for i in range(len(self.A)):
+            if self.__is_row_1(self.A, i) or self.__is_row_1(self.B, i):
+                lc = self.__constraint_to_vector(i)
+                for var, inv in zip(lc, batch_inverse(list(lc.values()))):
+                    constraint_index_for_lc[var] = i
+                    coef = MOD - inv
+                    linear_combination[var] = {j: value * coef % MOD for j, value in lc.items() if j != var}
+
+        nonzero_coefs = self.__nonzero_coefs()
+        best_estimation = self.time_estimation(cost_model)
+        best_var = -1
+        self.__build_occurrence_index()
+        pinned = set(self.pinned.values())
+        candidates = [var for var in range(self.num_variables)
+                      if self.__is_hidden_variable(var) and var not in pinned and linear_combination[var] is not None]
+        deltas = parallel_map(lambda var: self.__substitution_delta(var, linear_combination[var], constraint_index_for_lc[var]),
+                              candidates, workers, SUBSTITUTION_ITEMS_PER_WORKER)
+        for var, delta in zip(candidates, deltas):
+            estimation = self.__estimation(nonzero_coefs + delta, len(self.A) - 1, self.num_variables - 1, cost_model)
+            if estimation < best_estimation:
+                best_estimation = estimation
+                best_var = var
+        if best_var == -1:
+            return False
+        self.__substitute(best_var, linear_combination[best_var], constraint_index_for_lc[best_var])
+        return True
+
+    def __update_row_with_new_var(self, matrix: ConstraintMatrix, ind, w_support: list[int], w: list[int], w_inv: list[int], new_var: int):
+        part = self.__row_to_sparse_vector(matrix, ind)
         cnt_r = dict()
-        zeros_not_in_w = 0
-        for j in range(self.num_variables):
-            if w[j] != 0:
-                r = part_vec[j] / w[j]
-                cnt_r[r.x] = cnt_r.get(r.x, 0) + 1
-            elif part_vec[j] == 0:
-                zeros_not_in_w += 1
-        for r in cnt_r:
-            if r != 0:
-                cnt_r[r] -= 1
-        return (max([val for val in cnt_r.values()]) if len(cnt_r) > 0 else 0) + zeros_not_in_w
-
-    def __update_constraint_part_with_new_var(self, part: list[R1CS_term], w: list[Field], new_var: int):
-        part_vec = self.constraint_part_to_vector(part)
-        cnt_r = dict()
-        for j in range(self.num_variables):
-            if w[j] != 0:
-                r = part_vec[j] / w[j]
-                cnt_r[r.x] = cnt_r.get(r.x, 0) + 1
+        for j in w_support:
+            r = part.get(j, 0) * w_inv[j] % MOD
+            cnt_r[r] = cnt_r.get(r, 0) + 1
         for r in cnt_r:
             if r != 0:
                 cnt_r[r] -= 1
         r = 0 if len(cnt_r) == 0 else max([(cnt_r[r], r) for r in cnt_r])[1]
-        for j in range(self.num_variables):
-            part_vec[j] -= r * w[j]
-        part_vec[new_var] += r
-        return self.vector_to_constraint_part(part_vec)
+        for j in w_support:
+            part[j] = (part.get(j, 0) - r * w[j]) % MOD
+        part[new_var] = (part.get(new_var, 0) + r) % MOD
+        return [(var, part[var]) for var in sorted(part) if part[var] != 0]
 
     def __create_new_variable(self):
-        var = self.num_variables - self.io_size - 1
-        for constraint in self.constraints:
-            for part in [constraint.A, constraint.B, constraint.C]:
-                for term in part:
-                    if term.variable >= var:
-                        term.variable += 1
-        new_witness = []
-        witness_vars_num = self.num_variables - self.num_public_inputs - self.io_size
-        for i in range(len(self.witness)):
-            if i % witness_vars_num == var - self.num_public_inputs - self.io_size:
-                new_witness.append(Field(0))
-            new_witness.append(self.witness[i])
-        self.witness = new_witness
+        var = max(self.num_variables - self.io_size - 1, self.io_size + self.num_public_inputs)
+        self.__remap_variables({old_var: old_var + 1 for old_var in range(var, self.num_variables)})
+        self.__use_witness_storage()
+        self.witness.insert_column(var - self.num_public_inputs - self.io_size)
+        if self.origins is not None:
+            self.origins.insert(var, dict())
         self.num_variables += 1
         return var
 
-    def __reduce_nonzero_coefficients_step(self):
-        all_parts = []
-        for constraint in self.constraints:
-            for part in [constraint.A, constraint.B, constraint.C]:
-                all_parts.append(self.constraint_part_to_vector(part))
-
-        w = [Field(0) for _ in range(self.num_variables)]
-
+    def track_origins(self):
+        self.origins = [{var: 1} for var in range(self.num_variables)]
+
+    def __combine_origins(self, items):
+        origin = dict()
+        for var, coef in items:
+            for original_var, value in self.origins[var].items():
+                origin[original_var] = (origin.get(original_var, 0) + value * coef) % MOD
+        return {var: value for var, value in origin.items() if value != 0}
+
+    def __reduce_variables_sweep(self, cost_model=None, should_stop=None):
+        self.__build_occurrence_index()
+        pinned = set(self.pinned.values())
+        nonzero_coefs = self.__nonzero_coefs()
+        num_variables = self.num_variables
+        changed = False
+        ind = 0
+        while ind < len(self.A) and (should_stop is None or not should_stop()):
+            if not (self.__is_row_1(self.A, ind) or self.__is_row_1(self.B, ind)):
+                ind += 1
+                continue
+            lc = self.__constraint_to_vector(ind)
+            candidates = [var for var in lc if self.__is_hidden_variable(var) and var not in pinned]
+            best = None
+            for var, inv in zip(candidates, batch_inverse([lc[var] for var in candidates])):
+                coef = MOD - inv
+                var_lc = {j: value * coef % MOD for j, value in lc.items() if j != var}
+                delta = self.__substitution_delta(var, var_lc, ind)
+                if best is None or delta < best[0]:
+                    best = (delta, var, var_lc)
+            if best is not None and (self.__estimation(nonzero_coefs + best[0], len(self.A) - 1, num_variables - 1, cost_model) <
+                                     self.__estimation(nonzero_coefs, len(self.A), num_variables, cost_model)):
+                self.__substitute(best[1], best[2], ind)
+                nonzero_coefs += best[0]
+                num_variables -= 1
+                changed = True
+            else:
+                ind += 1
+        return changed
+
+    def pin_variables(self, variables):
+        self.pinned.update({var: var for var in variables})
+
+    def localize_foreign_variables(self, columns: dict):
+        for key in sorted(columns):
+            var = self.__create_new_variable()
+            self.witness.set_column(var - self.io_size - self.num_public_inputs, columns[key])
+            self.pinned[key] = var
+        for matrix in self.matrices():
+            for ind in range(len(matrix)):
+                items = matrix.row_items(ind)
+                if any([type(var) != int for var, _ in items]):
+                    matrix.set_row(ind, [(var if type(var) == int else self.pinned[tuple(var)], coef) for var, coef in items])
+
+    def restore_foreign_variables(self, keys):
+        foreign = {self.pinned[key]: list(key) for key in keys}
+        for matrix in self.matrices():
+            rows = set()
+            for var in foreign:
+                rows.update(matrix.column(var))
+            for ind in sorted(rows):
+                matrix.set_row(ind, [(foreign.get(var, var) if type(var) == int else var, coef) for var, coef in matrix.row_items(ind)])
+        for key in keys:
+            del self.pinned[key]
+        self.__delete_unused_hidden_variables()
+
+    def __reduce_nonzero_coefficients_step(self, cost_model=None):
+        parts = []
+        for ind in range(len(self.A)):
+            for matrix in self.matrices():
+                parts.append(self.__row_to_sparse_vector(matrix, ind))
+
+        search = CombinationSearch(parts, self.num_variables)
         is_first = True
         while True:
-            possib_vals = [set() for _ in range(self.num_variables)]
-            for var in range(self.num_variables):
-                if w[var] != 0:
-                    continue
-                possib_vals[var].add(1)
-                for part in all_parts:
-                    if part[var] == 0:
-                        continue
-                    for j in range(self.num_variables):
-                        if w[j] != 0 and part[j] != 0:
-                            possib_vals[var].add((w[j] * part[var] / part[j]).x)
-            possib = []
-            for var in range(self.num_variables):
-                for r in possib_vals[var]:
-                    possib.append((var, r))
-            best = None
-            best_delta = 0
-            for var, c in possib:
-                new_w = w.copy()
-                new_w[var] = c
-                delta = 0
-                for part in all_parts:
-                    delta += self.__calc_zeros_new_variable_in_constraint_part(part, new_w) - self.__calc_zeros_new_variable_in_constraint_part(part, w)
-                if not is_first:
-                    delta -= 1
-                if best_delta < delta or (delta == best_delta and best is None):
-                    best_delta = delta
-                    best = (var, c)
+            best = search.best()
             if best is None:
                 break
-            w[best[0]] = best[1]
+            delta, var, c = best
+            if not is_first:
+                delta -= 1
+            if delta < 0:
+                break
+            search.add(var, c)
             is_first = False
+        w, w_inv = search.w, search.w_inv
 
         new_r1cs = deepcopy(self)
         new_var = new_r1cs.__create_new_variable()
-        w = w[:new_var] + [Field(0)] + w[new_var:]
-
-        new_constraint = R1CS_constraint(None)
-        new_constraint.A = [R1CS_term((new_r1cs.io_size, 1))]
-        new_constraint.B = new_r1cs.vector_to_constraint_part(w)
-        new_constraint.C = [R1CS_term((new_var, 1))]
-
-        for i in range(new_r1cs.scheme_length):
-            witness_vars_nums = new_r1cs.num_variables - new_r1cs.num_public_inputs - new_r1cs.io_size
-            vals = new_r1cs.public_inputs[i*self.num_public_inputs:(i+1)*self.num_public_inputs] + new_r1cs.witness[i*witness_vars_nums:(i+1)*witness_vars_nums]
-            if i == 0:
-                vals = [Field(0) for _ in range(new_r1cs.io_size)] + vals
-            else:
-                vals = new_r1cs.witness[i*witness_vars_nums-new_r1cs.io_size:i*witness_vars_nums] + vals
-            new_var_val = 0
-            for j in range(new_r1cs.num_variables):
-                new_var_val += w[j] * vals[j]
-            new_r1cs.witness[i*witness_vars_nums+new_var-new_r1cs.num_public_inputs-new_r1cs.io_size] = new_var_val
-
-        for constraint in new_r1cs.constraints:
-            constraint.A = new_r1cs.__update_constraint_part_with_new_var(constraint.A, w, new_var)
-            constraint.B = new_r1cs.__update_constraint_part_with_new_var(constraint.B, w, new_var)
-            constraint.C = new_r1cs.__update_constraint_part_with_new_var(constraint.C, w, new_var)
-
-        new_r1cs.constraints.append(new_constraint)
-        new_r1cs.num_constraints = len(new_r1cs.constraints)
-        if self.time_estimation() > new_r1cs.time_estimation():
+        w = w[:new_var] + [0] + w[new_var:]
+        w_inv = w_inv[:new_var] + [0] + w_inv[new_var:]
+
+        w_support = [var for var in range(new_r1cs.num_variables) if w[var] != 0]
+        for matrix in new_r1cs.matrices():
+            rows = set()
+            for var in w_support:
+                rows.update(matrix.column(var))
+            for ind in sorted(rows):
+                matrix.set_row(ind, new_r1cs.__update_row_with_new_var(matrix, ind, w_support, w, w_inv, new_var))
+
+        new_r1cs.A.append_row([(new_r1cs.io_size, 1)])
+        new_r1cs.B.append_row(new_r1cs.__vector_to_items(w))
+        new_r1cs.C.append_row([(new_var, 1)])
+        new_r1cs.num_constraints = len(new_r1cs.A)
+        if self.time_estimation(cost_model) > new_r1cs.time_estimation(cost_model):
+            values = WitnessEvaluator(new_r1cs).combination_column([(var, w[var]) for var in w_support])
+            new_r1cs.witness.set_column(new_var - new_r1cs.io_size - new_r1cs.num_public_inputs, values)
+            if new_r1cs.origins is not None:
+                new_r1cs.origins[new_var] = new_r1cs.__combine_origins([(var, w[var]) for var in w_support])
             self.__dict__.update(new_r1cs.__dict__)
             return True
         return False
 
-    def reduce_constraints(self):
-        while True:
-            constraints_for_del = []
-            for ind in range(len(self.constraints)):
-                if not self.__check_constraint_necessity(ind):
-                    constraints_for_del.append((self.constraints[ind].size(), ind))
-            if len(constraints_for_del) == 0:
+    def __project_constraint(self, ind, points: list[dict]):
+        a_row, b_row, c_row = self.A.row(ind), self.B.row(ind), self.C.row(ind)
+        return [(sum([point[var] * coef for var, coef in zip(*a_row)]) % MOD *
+                 sum([point[var] * coef for var, coef in zip(*b_row)]) -
+                 sum([point[var] * coef for var, coef in zip(*c_row)])) % MOD for point in points]
+
+    def __project_block(self, seed, num_points, variables, candidates):
+        generator = Random(seed)
+        points = [{var: 1 if var == self.io_size else generator.randint(0, MOD - 1) for var in variables} for _ in range(num_points)]
+        return [self.__project_constraint(ind, points) for ind in candidates]
+
+    def __projections(self, candidates, workers=1):
+        num_points = len(candidates) + PROJECTION_EXTRA_POINTS
+        variables = set([self.io_size])
+        for ind in candidates:
+            for matrix in self.matrices():
+                variables.update(matrix.row(ind)[0])
+        blocks = [(randint(0, MOD - 1), min(PROJECTION_BLOCK_POINTS, num_points - first_point))
+                  for first_point in range(0, num_points, PROJECTION_BLOCK_POINTS)]
+        projections = [[] for _ in candidates]
+        for block in parallel_map(lambda block: self.__project_block(*block, variables, candidates), blocks, workers):
+            for projection, values in zip(projections, block):
+                projection.extend(values)
+        return projections
+
+    def __confirm_redundancy(self, constraint_ind, dependencies: LinearDependencies, deleted: set, vectors: dict, row_ids, candidates):
+        def vector(ind):
+            if ind not in vectors:
+                vectors[ind] = self.__constraint_to_vector(self.A.position(row_ids[ind]))
+            return vectors[ind]
+
+        for dependency in dependencies.dependencies:
+            if constraint_ind not in dependency:
+                continue
+            total = dict()
+            for ind, coef in dependency.items():
+                add_sparse_vector(total, vector(ind), coef)
+            if len(total) == 0:
+                return True
+        others = [vector(ind) for ind in candidates if ind != constraint_ind and ind not in deleted]
+        return check_vector_in_hull(others, vector(constraint_ind))
+
+    def __normalized_part(self, part: dict, coef):
+        return tuple(sorted([(var, value * coef % MOD) for var, value in part.items()]))
+
+    def __duplicate_constraints(self):
+        parts = [[self.__row_to_sparse_vector(matrix, ind) for matrix in self.matrices()] for ind in range(len(self.A))]
+        leading = []
+        for a, b, c in parts:
+            if len(a) == 0 or len(b) == 0:
+                leading += [c[min(c)] if len(c) > 0 else 1, 1]
+            else:
+                leading += [a[min(a)], b[min(b)]]
+        inverses = batch_inverse(leading)
+        kept = dict()
+        duplicates = set()
+        for ind, (a, b, c) in enumerate(parts):
+            a_inv, b_inv = inverses[2 * ind], inverses[2 * ind + 1]
+            if len(a) == 0 or len(b) == 0:
+                key = ((), (), self.__normalized_part(c, a_inv))
+            else:
+                a_key, b_key = self.__normalized_part(a, a_inv), self.__normalized_part(b, b_inv)
+                key = (min(a_key, b_key), max(a_key, b_key), self.__normalized_part(c, a_inv * b_inv))
+            rank = (self.__constraint_size(ind), ind)
+            if key not in kept:
+                kept[key] = rank
+            else:
+                duplicates.add(max(kept[key], rank)[1])
+                kept[key] = min(kept[key], rank)
+        return duplicates
+
+    def __isolated_by(self, parts, ind, var):
+        a, b, c = parts[ind]
+        if self.__is_variable_1(var):
+            return False
+        if var in a and var in b:
+            return True
+        if var in a or var in b:
+            return any([not self.__is_variable_1(other) for other in (b if var in a else a)])
+        return True
+
+    def __independent_constraints(self):
+        parts = [[self.__row_to_sparse_vector(matrix, ind) for matrix in self.matrices()] for ind in range(len(self.A))]
+        rows_of = dict()
+        for ind, (a, b, c) in enumerate(parts):
+            for var in set(a) | set(b) | set(c):
+                rows_of.setdefault(var, set()).add(ind)
+        independent = set()
+        stack = [var for var, rows in rows_of.items() if len(rows) == 1]
+        while len(stack) > 0:
+            var = stack.pop()
+            if len(rows_of[var]) != 1:
+                continue
+            ind = next(iter(rows_of[var]))
+            if not self.__isolated_by(parts, ind, var):
+                continue
+            independent.add(ind)
+            a, b, c = parts[ind]
+            for other in set(a) | set(b) | set(c):
+                rows_of[other].discard(ind)
+                if len(rows_of[other]) == 1:
+                    stack.append(other)
+        return independent
+
+    def reduce_constraints(self, probabilistic=False, workers=1, should_stop=None, on_step=None):
+        self.__delete_constraints(self.__duplicate_constraints())
+        independent = self.__independent_constraints()
+        candidates = [ind for ind in range(len(self.A)) if ind not in independent]
+        monomials = sum([self.A.row_size(ind) * self.B.row_size(ind) + self.C.row_size(ind) for ind in candidates])
+        probabilistic = probabilistic and monomials > len(candidates) * (len(candidates) + PROJECTION_EXTRA_POINTS)
+        if probabilistic:
+            dependencies = LinearDependencies(self.__projections(candidates, workers), candidates, dense=True)
+        else:
+            dependencies = LinearDependencies(parallel_map(self.__constraint_to_vector, candidates, workers, CONSTRAINT_ITEMS_PER_WORKER), candidates)
+        row_ids = array('l', self.A.row_ids)
+        sizes = [self.__constraint_size(ind) for ind in range(len(self.A))]
+        vectors = dict()
+        deleted = set()
+        while len(self.A) > 1 and (should_stop is None or not should_stop()):
+            constraints_for_del = sorted(dependencies.dependent_indices(), key=lambda ind: (sizes[ind], ind), reverse=True)
+            constraint_ind = None
+            for ind in constraints_for_del:
+                if not probabilistic or self.__confirm_redundancy(ind, dependencies, deleted, vectors, row_ids, candidates):
+                    constraint_ind = ind
+                    break
+            if constraint_ind is None:
                 break
-            constraints_for_del.sort(reverse=True)
-            self.__delete_constraint(constraints_for_del[0][1])
-
-    def reduce_variables(self):
-        while self.__reduce_variables_step():
+            dependencies.delete(constraint_ind)
+            deleted.add(constraint_ind)
+            self.__delete_constraints({self.A.position(row_ids[constraint_ind])})
+            if on_step is not None:
+                on_step(self)
+
+    def reduce_variables(self, workers=1, sweep=False, cost_model=None, should_stop=None, on_step=None):
+        if sweep:
+            while self.__reduce_variables_sweep(cost_model, should_stop):
+                self.__delete_unused_hidden_variables()
+                self.reduce_constraints(workers=workers, should_stop=should_stop, on_step=on_step)
+                if on_step is not None:
+                    on_step(self)
+            return
+        while (should_stop is None or not should_stop()) and self.__reduce_variables_step(workers, cost_model):
             self.__delete_unused_hidden_variables()
-            self.reduce_constraints()
+            self.reduce_constraints(workers=workers, should_stop=should_stop, on_step=on_step)
+            if on_step is not None:
+                on_step(self)
+
+    def reduce_nonzero_coefficients(self, cost_model=None, should_stop=None, on_step=None):
+        while (should_stop is None or not should_stop()) and self.__reduce_nonzero_coefficients_step(cost_model):
+            if on_step is not None:
+                on_step(self)
+
+    def connected_components(self):
+        parent = list(range(len(self.A) + 1))
+
+        def find(ind):
+            while parent[ind] != ind:
+                parent[ind] = parent[parent[ind]]
+                ind = parent[ind]
+            return ind
+
+        owner = dict()
+        for ind in range(len(self.A)):
+            has_hidden = False
+            for matrix in self.matrices():
+                for var in matrix.row(ind)[0]:
+                    if self.__is_hidden_variable(var):
+                        has_hidden = True
+                        parent[find(owner.setdefault(var, ind))] = find(ind)
+            if not has_hidden:
+                parent[find(ind)] = find(len(self.A))
+        components = dict()
+        for ind in range(len(self.A)):
+            components.setdefault(find(ind), ([], []))[0].append(ind)
+        for var in range(self.io_size + self.num_public_inputs, self.num_variables - self.io_size):
+            if var in owner:
+                components[find(owner[var])][1].append(var)
+            elif len(components) > 0:
+                components[find(0)][1].append(var)
+        return list(components.values())
+
+    def component(self, constraints: list[int], hidden: list[int]):
+        r1cs = R1CS(None)
+        r1cs.io_size = self.io_size
+        r1cs.num_public_inputs = self.num_public_inputs
+        r1cs.scheme_length = self.scheme_length
+        r1cs.num_variables = 2 * self.io_size + self.num_public_inputs + len(hidden)
+        first_witness_var = self.io_size + self.num_public_inputs
+        first_output_var = self.num_variables - self.io_size
+        mapping = {var: first_witness_var + k for k, var in enumerate(hidden)}
+        mapping.update({var: var - first_output_var + r1cs.num_variables - self.io_size for var in range(first_output_var, self.num_variables)})
+        r1cs.A, r1cs.B, r1cs.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+        for matrix, component_matrix in zip(self.matrices(), r1cs.matrices()):
+            for ind in constraints:
+                component_matrix.append_row([(mapping.get(var, var), coef) for var, coef in zip(*matrix.row(ind))])
+        r1cs.num_constraints = len(r1cs.A)
+        self.__use_witness_storage()
+        r1cs.public_inputs = self.public_inputs
+        r1cs.witness = Witness(self.witness.source, self.witness.source_width, self.scheme_length)
+        r1cs.witness.select_columns([])
+        r1cs.witness.append_columns(self.witness, [var - first_witness_var for var in hidden + list(range(first_output_var, self.num_variables))])
+        return r1cs
+
+    def __join_components(self, components):
+        first_witness_var = self.io_size + self.num_public_inputs
+        hidden_sizes = [r1cs.num_variables - 2 * self.io_size - self.num_public_inputs for r1cs in components]
+        self.num_variables = 2 * self.io_size + self.num_public_inputs + sum(hidden_sizes)
+        mappings = []
+        offset = first_witness_var
+        for hidden_size in hidden_sizes:
+            mappings.append(list(range(first_witness_var)) + list(range(offset, offset + hidden_size)) +
+                            list(range(self.num_variables - self.io_size, self.num_variables)))
+            offset += hidden_size
+        for k, matrix in enumerate(self.matrices()):
+            row_starts, indices, coefficients = array('l', [0]), array('l'), []
+            for r1cs, mapping in zip(components, mappings):
+                component_starts, component_indices, component_coefficients, _ = r1cs.matrices()[k].csr()
+                indices.extend([mapping[var] for var in component_indices])
+                row_starts.extend([row_starts[-1] + start for start in component_starts[1:]])
+                coefficients.extend(component_coefficients)
+            matrix.set_csr(row_starts, indices, coefficients)
+        self.num_constraints = len(self.A)
+        witness = Witness(self.witness.source, self.witness.source_width, self.scheme_length)
+        witness.select_columns([])
+        for r1cs, hidden_size in zip(components, hidden_sizes):
+            witness.append_columns(r1cs.witness, list(range(hidden_size)))
+        witness.append_columns(components[0].witness, list(range(hidden_sizes[0], hidden_sizes[0] + self.io_size)))
+        self.witness = witness
+
+    def optimize_components(self, workers=1, check=False, sweep=False, cost_model=None, manager=None):
+        if len(self.A) == 0:
+            return
+        self.__use_witness_storage()
 
-    def reduce_nonzero_coefficients(self):
-        while self.__reduce_nonzero_coefficients_step():
-            continue
+        def optimize(component):
+            r1cs = self.component(*component)
+            if manager is None:
+                r1cs.full_optimize(check=check, sweep=sweep, cost_model=cost_model)
+            else:
+                r1cs = manager.run(r1cs)
+            r1cs.public_inputs = None
+            r1cs.witness.source = None
+            return r1cs
+
+        components = parallel_map(optimize, self.connected_components(), workers)
+        for r1cs in components:
+            r1cs.public_inputs = self.public_inputs
+            r1cs.witness.source = self.witness.source
+        self.__join_components(components)
+
+    def check_satisfiability(self, pass_name=None):
+        failure = find_unsatisfied(self)
+        assert(failure is None), f'Constraint {failure[1]} is not satisfied at iteration {failure[0]}' + ('' if pass_name is None else f' after {pass_name}')
+
+    def full_optimize(self, workers=1, check=False, sweep=False, cost_model=None, checkpointer=None, start_pass=0):
+        passes = [('reduce_constraints', lambda on_step: self.reduce_constraints(workers=workers, on_step=on_step)),
+                  ('reduce_variables', lambda on_step: self.reduce_variables(workers, sweep, cost_model, on_step=on_step)),
+                  ('reduce_nonzero_coefficients', lambda on_step: self.reduce_nonzero_coefficients(cost_model, on_step=on_step))]
+        if 0 < start_pass < len(passes) and passes[start_pass][0] == 'reduce_variables':
+            self.reduce_constraints(workers=workers)
+        for index in range(start_pass, len(passes)):
+            name, run = passes[index]
+            run(None if checkpointer is None else lambda r1cs: checkpointer.step(r1cs, {'pass': index}))
+            if check:
+                self.check_satisfiability(name)
+            if checkpointer is not None:
+                checkpointer.save(self, {'pass': index + 1})
+
+def read_r1cs(stream: JsonStream):
+    r1cs = R1CS(None)
+    r1cs.A, r1cs.B, r1cs.C = ConstraintMatrix(), ConstraintMatrix(), ConstraintMatrix()
+    packed = {'public_inputs': bytearray(), 'witness': bytearray()}
+    for key in stream.iter_object():
+        if key == 'constraints':
+            for _ in stream.iter_array():
+                parts = dict()
+                for name in stream.iter_object():
+                    if name in ['A', 'B', 'C']:
+                        parts[name] = [(term['variable'], int(term['coefficient']) % MOD) for term in stream.read_value()]
+                    else:
+                        stream.read_value()
+                for matrix, name in zip(r1cs.matrices(), ['A', 'B', 'C']):
+                    matrix.append_row(parts[name])
+        elif key in ['public_inputs', 'witness']:
+            packed[key] = bytearray()
+            for value in stream.iter_values():
+                packed[key] += pack_element(value)
+        elif key in ['num_variables', 'num_public_inputs', 'num_constraints', 'io_size', 'scheme_length']:
+            setattr(r1cs, key, stream.expect('value'))
+        else:
+            stream.read_value()
+    r1cs.public_inputs = Witness(PackedElements(packed['public_inputs']), r1cs.num_public_inputs, r1cs.scheme_length)
+    r1cs.witness = Witness(PackedElements(packed['witness']), r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs, r1cs.scheme_length)
+    for i in range(r1cs.scheme_length):
+        assert(r1cs.public_inputs[i * r1cs.num_public_inputs] == 1)
+    return r1cs
 
-    def full_optimize(self):
-        self.reduce_constraints()
-        self.reduce_variables()
-        self.reduce_nonzero_coefficients()
+def read_r1cs_from_file(filename):
+    with open(filename, 'r') as f:
+        return read_r1cs(JsonStream(f))
 
 if __name__ == "__main__":
-    r1cs_json = eval(open('../r1cs_json/4.json', 'r').read())
-    r1cs = R1CS(r1cs_json)
+    r1cs = read_r1cs_from_file('../r1cs_json/4.json')
     print('Time estimation before optimization:', r1cs.time_estimation())
     #r1cs.reduce_constraints()
     #r1cs.reduce_variables()
@@ -0,0 +1,56 @@
+from witness_storage import as_witness
+from consts import MOD
+
+class WitnessEvaluator:
+    def __init__(self, r1cs, systems=None):
+        self.io_size = r1cs.io_size
+        self.num_public_inputs = r1cs.num_public_inputs
+        self.scheme_length = r1cs.scheme_length
+        self.width = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
+        self.public_inputs = as_witness(r1cs.public_inputs, r1cs.num_public_inputs, r1cs.scheme_length)
+        self.witness = as_witness(r1cs.witness, self.width, r1cs.scheme_length)
+        self.systems = [] if systems is None else systems
+
+    def value(self, iteration, var):
+        if type(var) != int:
+            return self.systems[var[0]].value(iteration, var[1])
+        if var < self.io_size:
+            return self.witness.value(iteration - 1, self.width - self.io_size + var) if iteration > 0 else 0
+        if var < self.io_size + self.num_public_inputs:
+            return self.public_inputs.value(iteration, var - self.io_size)
+        return self.witness.value(iteration, var - self.io_size - self.num_public_inputs)
+
+    def combination(self, iteration, items):
+        return sum([self.value(iteration, var) * coef for var, coef in items]) % MOD
+
+    def product(self, iteration, a_items, b_items):
+        return self.combination(iteration, a_items) * self.combination(iteration, b_items) % MOD
+
+    def column(self, var, start=0, stop=None):
+        stop = self.scheme_length if stop is None else stop
+        if type(var) != int:
+            return self.systems[var[0]].column(var[1], start, stop)
+        if var < self.io_size:
+            if start >= stop:
+                return []
+            column = self.width - self.io_size + var
+            return ([0] + self.witness.column(column, 0, stop - 1)) if start == 0 else self.witness.column(column, start - 1, stop - 1)
+        if var < self.io_size + self.num_public_inputs:
+            return self.public_inputs.column(var - self.io_size, start, stop)
+        return self.witness.column(var - self.io_size - self.num_public_inputs, start, stop)
+
+    def combination_column(self, items, start=0, stop=None, columns=None):
+        stop = self.scheme_length if stop is None else stop
+        columns = dict() if columns is None else columns
+        result = [0] * (stop - start)
+        for var, coef in items:
+            key = var if type(var) == int else tuple(var)
+            if key not in columns:
+                columns[key] = self.column(var, start, stop)
+            for i, value in enumerate(columns[key]):
+                result[i] += value * coef
+        return [value % MOD for value in result]
+
+    def product_column(self, a_items, b_items, start=0, stop=None, columns=None):
+        return [a * b % MOD for a, b in zip(self.combination_column(a_items, start, stop, columns),
+                                            self.combination_column(b_items, start, stop, columns))]
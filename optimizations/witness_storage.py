@@ -0,0 +1,113 @@
+from field_class import Field
+from consts import MOD
+
+ELEMENT_SIZE = 32
+
+def to_int(value):
+    return value.x if type(value) == Field else int(value) % MOD
+
+def pack_element(value):
+    return to_int(value).to_bytes(ELEMENT_SIZE, 'little')
+
+class PackedElements:
+    def __init__(self, data, offset=0, count=None):
+        self.data = data
+        self.offset = offset
+        self.count = (len(data) - offset) // ELEMENT_SIZE if count is None else count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        pos = self.offset + ELEMENT_SIZE * index
+        return int.from_bytes(self.data[pos:pos + ELEMENT_SIZE], 'little')
+
+class Witness:
+    def __init__(self, source, width, scheme_length):
+        self.source = source
+        self.source_width = width
+        self.scheme_length = scheme_length
+        self.columns = list(range(width))
+        self.extra = []
+
+    def __deepcopy__(self, memo):
+        witness = Witness(self.source, self.source_width, self.scheme_length)
+        witness.columns = self.columns.copy()
+        witness.extra = [None if values is None else values.copy() for values in self.extra]
+        return witness
+
+    def width(self):
+        return len(self.columns)
+
+    def __len__(self):
+        return self.scheme_length * len(self.columns)
+
+    def value(self, iteration, column):
+        source_column = self.columns[column]
+        if source_column >= 0:
+            return to_int(self.source[iteration * self.source_width + source_column])
+        values = self.extra[-1 - source_column]
+        return 0 if values is None else values[iteration]
+
+    def column(self, column, start=0, stop=None):
+        stop = self.scheme_length if stop is None else stop
+        source_column = self.columns[column]
+        if source_column >= 0:
+            return [to_int(self.source[i]) for i in range(start * self.source_width + source_column, stop * self.source_width, self.source_width)]
+        values = self.extra[-1 - source_column]
+        return [0] * (stop - start) if values is None else values[start:stop]
+
+    def row(self, iteration):
+        return [self.value(iteration, column) for column in range(len(self.columns))]
+
+    def __flat_value(self, index):
+        return self.value(index // len(self.columns), index % len(self.columns))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Field(self.__flat_value(i)) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Field(self.__flat_value(index))
+
+    def __setitem__(self, index, value):
+        iteration, column = divmod(index, len(self.columns))
+        if self.columns[column] >= 0 or self.extra[-1 - self.columns[column]] is None:
+            self.set_column(column, [self.value(i, column) for i in range(self.scheme_length)])
+        self.extra[-1 - self.columns[column]][iteration] = to_int(value)
+
+    def __iter__(self):
+        for iteration in range(self.scheme_length):
+            for value in self.row(iteration):
+                yield Field(value)
+
+    def select_columns(self, columns: list[int]):
+        self.columns = [self.columns[column] for column in columns]
+        used = set([source_column for source_column in self.columns if source_column < 0])
+        for k in range(len(self.extra)):
+            if -1 - k not in used:
+                self.extra[k] = None
+
+    def insert_column(self, column, values=None):
+        self.columns.insert(column, -1 - len(self.extra))
+        self.extra.append(values)
+
+    def set_column(self, column, values: list[int]):
+        self.columns[column] = -1 - len(self.extra)
+        self.extra.append(values)
+
+    def append_columns(self, witness, columns: list[int]):
+        for column in columns:
+            source_column = witness.columns[column]
+            if source_column >= 0 and witness.source is self.source and witness.source_width == self.source_width:
+                self.columns.append(source_column)
+            else:
+                self.columns.append(-1 - len(self.extra))
+                self.extra.append(witness.column(column))
+
+def as_witness(values, width, scheme_length):
+    if isinstance(values, Witness):
+        return values
+    return Witness(values, width, scheme_length)
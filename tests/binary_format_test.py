@@ -0,0 +1,38 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.binary_format import BinaryR1CSFile, write_r1cs_binary, read_r1cs_binary, is_binary_file
+from optimizations.r1cs_creator import create_with_extra_variables
+from optimizations.ensemble_creator import create_dependent_ensemble
+from optimizations.ensemble_r1cs import read_ensemble_from_file
+from optimizations.r1cs_utils import write_r1cs_to_file
+from optimizations.satisfiability import find_unsatisfied
+
+def test_single_round_trip(tmp_path):
+    r1cs = create_with_extra_variables()
+    filename = str(tmp_path / 'r1cs.bin')
+    write_r1cs_binary(r1cs, filename)
+    assert(is_binary_file(filename))
+    loaded = read_r1cs_binary(filename)
+    assert(loaded.to_json_format() == r1cs.to_json_format())
+    member = BinaryR1CSFile(filename).members[0]
+    for iteration in range(r1cs.scheme_length):
+        assert(member.witness_slice(iteration) == loaded.witness.row(iteration))
+        assert(member.public_inputs_slice(iteration) == loaded.public_inputs.row(iteration))
+
+def test_ensemble_round_trip(tmp_path):
+    ensemble = create_dependent_ensemble()
+    filename = str(tmp_path / 'ensemble.bin')
+    write_r1cs_binary(ensemble, filename)
+    loaded = read_r1cs_binary(filename)
+    assert(loaded.to_json_format() == ensemble.to_json_format())
+    r1cs = loaded.to_single_r1cs()
+    assert(r1cs.to_json_format() == ensemble.to_single_r1cs().to_json_format())
+    assert(find_unsatisfied(r1cs) is None)
+
+def test_json_binary_conversion(tmp_path):
+    ensemble = create_dependent_ensemble()
+    json_filename, binary_filename = str(tmp_path / 'ensemble.json'), str(tmp_path / 'ensemble.bin')
+    write_r1cs_to_file(ensemble, json_filename)
+    write_r1cs_binary(read_ensemble_from_file(json_filename), binary_filename)
+    write_r1cs_to_file(read_r1cs_binary(binary_filename), json_filename, compact=True)
+    assert(read_ensemble_from_file(json_filename).to_json_format() == ensemble.to_json_format())
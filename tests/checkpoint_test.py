@@ -0,0 +1,104 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.checkpoint import Checkpointer, load_checkpoint, input_digest
+from optimizations.optimization_cache import options_key
+from optimizations.pass_manager import PassManager
+from optimizations.r1cs_creator import create_with_extra_variables
+from optimizations.single_r1cs import R1CS
+from optimizations.r1cs_utils import write_r1cs_to_file
+from copy import deepcopy
+import subprocess
+
+class CrashingCheckpointer(Checkpointer):
+    def __init__(self, filename, crash_step=3):
+        super().__init__(filename, 0)
+        self.crash_step = crash_step
+
+    def step(self, r1cs, position):
+        super().step(r1cs, position)
+        if self.steps == self.crash_step:
+            raise KeyboardInterrupt()
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    r1cs = create_with_extra_variables()
+    expected = deepcopy(r1cs)
+    expected.full_optimize()
+    checkpoint = str(tmp_path / 'r1cs.checkpoint')
+    try:
+        r1cs.full_optimize(checkpointer=CrashingCheckpointer(checkpoint))
+    except KeyboardInterrupt:
+        pass
+    resumed, checkpointer = load_checkpoint(checkpoint)
+    assert(checkpointer.steps == 3)
+    resumed.full_optimize(checkpointer=checkpointer, start_pass=checkpointer.state['pass'])
+    assert(resumed.to_json_format() == expected.to_json_format())
+
+def term(var, coef=1):
+    return {'variable': var, 'coefficient': str(coef)}
+
+def create_with_hidden_sums():
+    one, p, x, y, z, w, h, q1, q2, q3, q4, o1, o2, out = range(1, 15)
+    constraints = [{'A': [term(p)], 'B': [term(p)], 'C': [term(x)]},
+                   {'A': [term(x)], 'B': [term(p)], 'C': [term(y)]},
+                   {'A': [term(x)], 'B': [term(y)], 'C': [term(z)]},
+                   {'A': [term(y)], 'B': [term(z)], 'C': [term(w)]},
+                   {'A': [term(one)], 'B': [term(x), term(y)], 'C': [term(h)]}]
+    for factor, parts, total in [(z, (q1, q2), o1), (w, (q3, q4), o2)]:
+        constraints += [{'A': [term(h)], 'B': [term(factor)], 'C': [term(total)]},
+                        {'A': [term(x)], 'B': [term(factor)], 'C': [term(parts[0])]},
+                        {'A': [term(y)], 'B': [term(factor)], 'C': [term(parts[1])]},
+                        {'A': [term(one)], 'B': [term(parts[0]), term(parts[1])], 'C': [term(total)]}]
+    constraints.append({'A': [term(one)], 'B': [term(o1), term(o2), term(0)], 'C': [term(out)]})
+    public_inputs, witness, out_value = [], [], 0
+    for p_value in [2, 3, 4]:
+        x_value = p_value * p_value
+        y_value = x_value * p_value
+        z_value = x_value * y_value
+        w_value = y_value * z_value
+        out_value += (x_value + y_value) * (z_value + w_value)
+        public_inputs += ['1', str(p_value)]
+        witness += [str(value) for value in [x_value, y_value, z_value, w_value, x_value + y_value, x_value * z_value, y_value * z_value,
+                                             x_value * w_value, y_value * w_value, (x_value + y_value) * z_value,
+                                             (x_value + y_value) * w_value, out_value]]
+    return R1CS({'num_variables': 15, 'num_public_inputs': 2, 'num_constraints': len(constraints), 'io_size': 1,
+                 'scheme_length': 3, 'constraints': constraints, 'public_inputs': public_inputs, 'witness': witness})
+
+def test_resume_inside_nested_constraint_reduction(tmp_path):
+    r1cs = create_with_hidden_sums()
+    checkpoint = str(tmp_path / 'r1cs.checkpoint')
+    expected = deepcopy(r1cs)
+    counter = Checkpointer(checkpoint, 0)
+    expected.full_optimize(checkpointer=counter)
+    for crash_step in range(1, counter.steps + 1):
+        try:
+            deepcopy(r1cs).full_optimize(checkpointer=CrashingCheckpointer(checkpoint, crash_step))
+        except KeyboardInterrupt:
+            pass
+        resumed, checkpointer = load_checkpoint(checkpoint)
+        resumed.full_optimize(checkpointer=checkpointer, start_pass=checkpointer.state['pass'])
+        assert(resumed.to_json_format() == expected.to_json_format())
+    expected = PassManager().run(r1cs)
+    counter = Checkpointer(checkpoint, 0)
+    PassManager(checkpointer=counter).run(r1cs)
+    for crash_step in range(1, counter.steps + 1):
+        PassManager(checkpointer=CrashingCheckpointer(checkpoint, crash_step)).run(r1cs)
+        resumed, checkpointer = load_checkpoint(checkpoint)
+        assert(PassManager(checkpointer=checkpointer).run(resumed, checkpointer.state).to_json_format() == expected.to_json_format())
+
+def test_resume_rejects_other_input_or_options(tmp_path):
+    source, other, target = [str(tmp_path / name) for name in ['source.json', 'other.json', 'target.json']]
+    r1cs = create_with_hidden_sums()
+    write_r1cs_to_file(r1cs, source)
+    write_r1cs_to_file(create_with_extra_variables(), other)
+    checkpoint = target + '.checkpoint'
+    state = {'mode': 'full_optimize', 'input': input_digest(source), 'initial_estimation': r1cs.time_estimation(),
+             'options': options_key(mode='full_optimize', sweep=False, cost_model=None, pipeline=None, max_rounds=None, min_rate=None)}
+
+    def resume(*args):
+        Checkpointer(checkpoint, 0, dict(state)).save(r1cs, {'pass': 0})
+        return subprocess.run([sys.executable, '../optimizations/optimize_r1cs.py', '--resume', *args, target], capture_output=True, text=True)
+
+    assert(resume(other).returncode == 1)
+    assert(resume('--sweep', source).returncode == 1)
+    assert(resume('--cost-model', 'nova', source).returncode == 1)
+    assert(resume(source).returncode == 0)
@@ -0,0 +1,26 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.cost_model import NovaCostModel, fit_nova_coefficients, next_power_of_two
+from optimizations.r1cs_creator import create_for_new_vars_optimization
+from optimizations.satisfiability import find_unsatisfied
+
+def test_fit_nova_coefficients():
+    model = NovaCostModel({'nonzeros': 2, 'padded_constraints': 3, 'padded_variables': 1, 'io_size': 7, 'constant': 5})
+    samples = []
+    for num_constraints, nonzeros, num_variables, io_size, scheme_length in [(10, 40, 12, 1, 2), (100, 250, 90, 2, 3), (1000, 3000, 700, 1, 1),
+                                                                             (30, 200, 40, 4, 5), (500, 900, 520, 3, 2), (7, 20, 9, 2, 8)]:
+        samples.append({'nonzeros': nonzeros, 'num_constraints': num_constraints, 'num_variables': num_variables, 'io_size': io_size,
+                        'scheme_length': scheme_length, 'seconds': model.estimate(nonzeros, num_constraints, num_variables, io_size, scheme_length)})
+    coefficients = fit_nova_coefficients(samples)
+    for name, value in model.coefficients.items():
+        assert(abs(coefficients[name] - value) < 1e-6)
+
+def test_cost_model_guides_optimization():
+    r1cs = create_for_new_vars_optimization()
+    num_constraints = r1cs.num_constraints
+    r1cs.reduce_nonzero_coefficients(NovaCostModel({'nonzeros': 0}))
+    assert(r1cs.num_constraints == num_constraints)
+    r1cs.reduce_nonzero_coefficients(NovaCostModel())
+    assert(r1cs.num_constraints > num_constraints)
+    assert(next_power_of_two(r1cs.num_constraints) == next_power_of_two(num_constraints))
+    assert(find_unsatisfied(r1cs) is None)
@@ -1,8 +1,12 @@
+import random
 import subprocess
 import sys
 sys.path.append('../optimizations')
 from optimizations.ensemble_creator import create_independent_ensemble, create_dependent_ensemble
+from optimizations.ensemble_r1cs import EnsembleR1CS
 from optimizations.r1cs_utils import write_r1cs_to_file
+from optimizations.satisfiability import find_unsatisfied
+from optimizations.single_r1cs import R1CS
 
 def run_rust_program(json_path: str):
     result = subprocess.run(
@@ -28,6 +32,74 @@ def test_dependent_ensemble():
     run_rust_program('../r1cs_json/dependent_ensemble.json')
 
 
+def test_optimize_dependent_ensemble():
+    ensemble = create_dependent_ensemble()
+    estimation = ensemble.to_single_r1cs().time_estimation()
+    r1cs = ensemble.optimize(workers=2)
+    assert(find_unsatisfied(r1cs) is None)
+    assert(r1cs.time_estimation() <= estimation)
+
+
+def test_optimize_independent_components():
+    random.seed(0)
+    r1cs = create_independent_ensemble().to_single_r1cs()
+    estimation = r1cs.time_estimation()
+    assert(len(r1cs.connected_components()) > 1)
+    r1cs.optimize_components(workers=2)
+    assert(find_unsatisfied(r1cs) is None)
+    assert(r1cs.time_estimation() < estimation)
+
+
+def term(var, coef=1):
+    return {'variable': var, 'coefficient': str(coef)}
+
+
+def test_optimize_component_without_hidden_variables():
+    io_size, scheme_length = 6, 3
+    one, first_hidden, first_output = io_size, io_size + 1, io_size + 3
+    constraints = [{'A': [term(one)], 'B': [term(var) for var in range(io_size)] + [term(one, k + 1)], 'C': [term(first_output + k)]}
+                   for k in range(io_size)]
+    constraints.append({'A': [term(0)], 'B': [term(1)], 'C': [term(first_hidden)]})
+    constraints.append({'A': [term(first_hidden)], 'B': [term(first_hidden)], 'C': [term(first_hidden + 1)]})
+    witness, inputs = [], [0] * io_size
+    for _ in range(scheme_length):
+        hidden = [inputs[0] * inputs[1], (inputs[0] * inputs[1]) ** 2]
+        inputs = [sum(inputs) + k + 1 for k in range(io_size)]
+        witness += [str(value) for value in hidden + inputs]
+    r1cs = R1CS({'num_variables': 2 * io_size + 3, 'num_public_inputs': 1, 'num_constraints': len(constraints),
+                 'io_size': io_size, 'scheme_length': scheme_length, 'constraints': constraints,
+                 'public_inputs': ['1'] * scheme_length, 'witness': witness})
+    assert(find_unsatisfied(r1cs) is None)
+    assert(len(r1cs.connected_components()) == 2)
+    r1cs.optimize_components()
+    assert(find_unsatisfied(r1cs) is None)
+
+
+def test_optimize_member_without_hidden_variables():
+    scheme_length = 3
+    first, second = [], []
+    value, total = 0, 0
+    for _ in range(scheme_length):
+        hidden = value * value
+        first += [str(hidden), str(hidden + 1)]
+        total += hidden
+        second += [str(total)]
+        value = hidden + 1
+    ensemble = EnsembleR1CS([
+        {'num_variables': 4, 'num_public_inputs': 1, 'num_constraints': 2, 'io_size': 1, 'scheme_length': scheme_length,
+         'constraints': [{'A': [term(0)], 'B': [term(0)], 'C': [term(2)]},
+                         {'A': [term(1)], 'B': [term(2), term(1)], 'C': [term(3)]}],
+         'public_inputs': ['1'] * scheme_length, 'witness': first},
+        {'num_variables': 3, 'num_public_inputs': 1, 'num_constraints': 1, 'io_size': 1, 'scheme_length': scheme_length,
+         'constraints': [{'A': [term(1)], 'B': [term(0), term([0, 2])], 'C': [term(2)]}],
+         'public_inputs': ['1'] * scheme_length, 'witness': second}])
+    assert(find_unsatisfied(ensemble.to_single_r1cs()) is None)
+    r1cs = ensemble.optimize()
+    assert(find_unsatisfied(r1cs) is None)
+
+
 if __name__ == "__main__":
     test_independent_ensemble()
-    test_dependent_ensemble()
\ No newline at end of file
+    test_dependent_ensemble()
+    test_optimize_dependent_ensemble()
+    test_optimize_independent_components()
\ No newline at end of file
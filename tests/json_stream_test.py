@@ -0,0 +1,69 @@
+import io
+import json
+import sys
+sys.path.append('../optimizations')
+from optimizations.json_stream import JsonStream
+from optimizations.single_r1cs import R1CS, read_r1cs
+
+FIXTURES = ['../r1cs_json/0.json', '../r1cs_json/4.json', '../r1cs_json/dependent_ensemble.json']
+CHUNK_SIZES = [1, 2, 7]
+
+def test_read_value_matches_json_load():
+    for filename in FIXTURES:
+        with open(filename, 'r') as f:
+            expected = json.load(f)
+        for chunk_size in CHUNK_SIZES:
+            with open(filename, 'r') as f:
+                assert(JsonStream(f, chunk_size).read_value() == expected)
+
+def test_read_r1cs_matches_json_load():
+    with open('../r1cs_json/0.json', 'r') as f:
+        expected = R1CS(json.load(f)).to_json_format()
+    for chunk_size in CHUNK_SIZES:
+        with open('../r1cs_json/0.json', 'r') as f:
+            assert(read_r1cs(JsonStream(f, chunk_size)).to_json_format() == expected)
+
+def test_integer_witness_and_unknown_keys():
+    r1cs_json = {'num_variables': 5, 'num_public_inputs': 1, 'num_constraints': 1, 'io_size': 1, 'scheme_length': 2,
+                 'comment': {'author': 'a "quoted" name\\n', 'tags': [1, 2.5, True, None]},
+                 'constraints': [{'A': [{'variable': 1, 'coefficient': '1'}], 'B': [{'variable': 2, 'coefficient': '3'}],
+                                  'C': [{'variable': 3, 'coefficient': '1'}], 'note': 'ignored'}],
+                 'public_inputs': [1, '1'],
+                 'witness': [2, '6', 0, 7, '21', 2],
+                 'extra': []}
+    expected = R1CS(json.loads(json.dumps(r1cs_json))).to_json_format()
+    for chunk_size in CHUNK_SIZES:
+        for text in [json.dumps(r1cs_json), json.dumps(r1cs_json, indent=2)]:
+            assert(read_r1cs(JsonStream(io.StringIO(text), chunk_size)).to_json_format() == expected)
+
+def test_escaped_strings():
+    values = ['plain', 'with \\"quotes\\"', 'back\\\\slash', 'uni\\u00e9', '12', '']
+    text = json.dumps({'values': values, 'key with \\"escape\\"': -1.5e3})
+    for chunk_size in CHUNK_SIZES:
+        stream = JsonStream(io.StringIO(text), chunk_size)
+        keys = []
+        for key in stream.iter_object():
+            keys.append(key)
+            if key == 'values':
+                assert(list(stream.iter_values()) == values)
+            else:
+                assert(stream.read_value() == -1500.0)
+        assert(keys == list(json.loads(text)))
+
+def test_trailing_comma_is_rejected():
+    for text in ['["1",]', '[1,]', '["1", 2 , ]', '[,]']:
+        for chunk_size in CHUNK_SIZES:
+            try:
+                list(JsonStream(io.StringIO(text), chunk_size).iter_values())
+                assert(False), text
+            except ValueError:
+                pass
+    for chunk_size in CHUNK_SIZES:
+        assert(list(JsonStream(io.StringIO('[ ]'), chunk_size).iter_values()) == [])
+
+if __name__ == "__main__":
+    test_read_value_matches_json_load()
+    test_read_r1cs_matches_json_load()
+    test_integer_witness_and_unknown_keys()
+    test_escaped_strings()
+    test_trailing_comma_is_rejected()
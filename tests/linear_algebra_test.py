@@ -0,0 +1,50 @@
+import random
+import sys
+sys.path.append('../optimizations')
+from optimizations.field_class import Field
+from optimizations.linear_algebra import SparseGauss, LinearDependencies, check_vector_in_hull, check_vectors_in_hull
+
+def random_sparse_vector(dimension, max_nonzeros):
+    vector = dict()
+    for key in random.sample(range(dimension), random.randint(0, max_nonzeros)):
+        vector[key] = Field(random.randint(1, 5))
+    return vector
+
+def random_combination(vectors):
+    result = dict()
+    for vector in vectors:
+        coef = Field(random.randint(0, 5))
+        for key, value in vector.items():
+            result[key] = result.get(key, Field(0)) + coef * value
+    return {key: value for key, value in result.items() if value != 0}
+
+def test_sparse_gauss_rank():
+    for _ in range(100):
+        vectors = [random_sparse_vector(8, 4) for _ in range(random.randint(1, 10))]
+        gauss = SparseGauss(vectors, track_combinations=True)
+        assert(gauss.rank() + len(gauss.dependencies) == len(vectors))
+        for dependency in gauss.dependencies:
+            total = dict()
+            for ind, coef in dependency.items():
+                for key, value in vectors[ind].items():
+                    total[key] = total.get(key, Field(0)) + coef * value
+            assert(all(value == 0 for value in total.values()))
+
+def test_check_vector_in_hull():
+    for _ in range(100):
+        vectors = [random_sparse_vector(10, 3) for _ in range(random.randint(1, 5))]
+        assert(check_vector_in_hull(vectors, random_combination(vectors)))
+        outside = {('outside', 0): Field(1)}
+        assert(check_vectors_in_hull(vectors, [outside, {}]) == [False, True])
+
+def test_linear_dependencies_delete():
+    vectors = [{0: Field(1)}, {1: Field(1)}, {0: Field(2), 1: Field(3)}, {2: Field(1)}]
+    dependencies = LinearDependencies(vectors)
+    assert(dependencies.dependent_indices() == {0, 1, 2})
+    dependencies.delete(2)
+    assert(dependencies.dependent_indices() == set())
+
+if __name__ == "__main__":
+    test_sparse_gauss_rank()
+    test_check_vector_in_hull()
+    test_linear_dependencies_delete()
@@ -0,0 +1,41 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.optimization_cache import OptimizationCache, structure_key
+from optimizations.r1cs_creator import create_for_new_vars_optimization
+from optimizations.satisfiability import find_unsatisfied
+from optimizations.witness_storage import Witness
+from copy import deepcopy
+import os
+
+def shortened(r1cs, scheme_length):
+    result = deepcopy(r1cs)
+    width = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
+    result.scheme_length = scheme_length
+    result.witness = Witness([el.x for el in r1cs.witness[:scheme_length * width]], width, scheme_length)
+    result.public_inputs = Witness([el.x for el in r1cs.public_inputs[:scheme_length * r1cs.num_public_inputs]],
+                                   r1cs.num_public_inputs, scheme_length)
+    return result
+
+def test_cache_replays_on_new_witness(tmp_path):
+    cache = OptimizationCache(str(tmp_path))
+    r1cs = create_for_new_vars_optimization()
+    other = shortened(r1cs, r1cs.scheme_length - 1)
+    key = structure_key(r1cs)
+    assert(key == structure_key(other))
+    assert(cache.load(key, r1cs) is None)
+    r1cs.track_origins()
+    r1cs.full_optimize()
+    cache.store(key, r1cs)
+    expected = deepcopy(other)
+    expected.full_optimize()
+    replayed = cache.load(key, other)
+    assert(find_unsatisfied(replayed) is None)
+    assert(replayed.to_json_format() == expected.to_json_format())
+
+def test_cache_eviction(tmp_path):
+    cache = OptimizationCache(str(tmp_path), max_size=0)
+    r1cs = create_for_new_vars_optimization()
+    key = structure_key(r1cs)
+    r1cs.track_origins()
+    cache.store(key, r1cs)
+    assert(len(os.listdir(str(tmp_path))) == 0)
@@ -0,0 +1,32 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.pass_manager import PassManager
+from optimizations.r1cs_creator import create_with_extra_variables
+from optimizations.satisfiability import find_unsatisfied
+
+def test_pass_manager_reaches_fixpoint():
+    r1cs = create_with_extra_variables()
+    old_time_estimation = r1cs.time_estimation()
+    manager = PassManager(check=True)
+    best = manager.run(r1cs)
+    assert(best.time_estimation() < old_time_estimation)
+    assert(r1cs.time_estimation() == old_time_estimation)
+    assert(find_unsatisfied(best) is None)
+    last_round = [cost for rounds, _, _, cost, _ in manager.history if rounds == manager.history[-1][0]]
+    assert(min(last_round) == best.time_estimation())
+    assert(not manager.truncated)
+
+def test_pass_manager_budget():
+    r1cs = create_with_extra_variables()
+    manager = PassManager(['constraints', 'variables'], time_budget=0)
+    best = manager.run(r1cs)
+    assert(len(manager.history) == 0)
+    assert(best.time_estimation() == r1cs.time_estimation())
+    assert(manager.truncated)
+    manager = PassManager(['constraints'], max_rounds=1)
+    manager.run(r1cs)
+    assert(len(manager.history) == 1)
+    assert(not manager.truncated)
+    manager = PassManager(min_rate=float('inf'))
+    manager.run(r1cs)
+    assert(manager.truncated)
@@ -3,6 +3,10 @@ import sys
 sys.path.append('../optimizations')
 from optimizations.r1cs_creator import create_for_new_vars_optimization, create_with_extra_variables, create_with_extra_constraints
 from optimizations.r1cs_utils import write_r1cs_to_file
+from optimizations.consts import MOD
+from optimizations.satisfiability import find_unsatisfied
+from optimizations.single_r1cs import R1CS
+from copy import deepcopy
 
 def run_rust_program(json_path: str):
     result = subprocess.run(
@@ -46,7 +50,48 @@ def test_new_vars_optimization():
     write_r1cs_to_file(r1cs, '../r1cs_json/3_reduced.json')
     run_rust_program('../r1cs_json/3_reduced.json')
 
+def test_scalar_multiple_constraints():
+    r1cs = create_with_extra_variables()
+    duplicated = deepcopy(r1cs)
+    a, b, c = [matrix.row_items(0) for matrix in duplicated.matrices()]
+    duplicated.A.append_row([(var, coef * 3 % MOD) for var, coef in b])
+    duplicated.B.append_row([(var, coef * 5 % MOD) for var, coef in a])
+    duplicated.C.append_row([(var, coef * 15 % MOD) for var, coef in c])
+    duplicated.num_constraints += 1
+    r1cs.reduce_constraints()
+    duplicated.reduce_constraints()
+    assert(duplicated.num_constraints == r1cs.num_constraints)
+
+def test_sweep_variables_reduction():
+    r1cs = create_with_extra_variables()
+    old_time_estimation = r1cs.time_estimation()
+    r1cs.reduce_variables(sweep=True)
+    assert(old_time_estimation > r1cs.time_estimation())
+    assert(find_unsatisfied(r1cs) is None)
+
+def test_probabilistic_constraints_reduction():
+    for r1cs in [create_with_extra_constraints(), create_with_extra_constraints(num_variables=40, num_additional_constraints=10, k_not_zeros=20)]:
+        projected = deepcopy(r1cs)
+        r1cs.reduce_constraints()
+        projected.reduce_constraints(probabilistic=True)
+        assert(projected.to_json_format() == r1cs.to_json_format())
+
+def test_trivial_constraint_with_own_variable():
+    def term(var):
+        return {'variable': var, 'coefficient': '1'}
+    constraints = [{'A': [term(0)], 'B': [term(0)], 'C': [term(2)]},
+                   {'A': [term(3)], 'B': [term(1)], 'C': [term(3)]},
+                   {'A': [term(2)], 'B': [term(1)], 'C': [term(4)]}]
+    r1cs = R1CS({'num_variables': 5, 'num_public_inputs': 1, 'num_constraints': 3, 'io_size': 1, 'scheme_length': 1,
+                 'constraints': constraints, 'public_inputs': ['1'], 'witness': ['0', '7']})
+    r1cs.reduce_constraints()
+    assert(r1cs.num_constraints == 2)
+    assert([r1cs.C.row_items(ind) for ind in range(2)] == [[(2, 1)], [(4, 1)]])
+
 if __name__ == "__main__":
     test_extra_constraints()
     test_extra_variables()
     test_new_vars_optimization()
+    test_scalar_multiple_constraints()
+    test_sweep_variables_reduction()
+    test_probabilistic_constraints_reduction()
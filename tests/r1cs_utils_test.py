@@ -0,0 +1,26 @@
+import json
+import sys
+sys.path.append('../optimizations')
+from optimizations.r1cs_creator import create_with_extra_variables
+from optimizations.ensemble_creator import create_dependent_ensemble
+from optimizations.r1cs_utils import write_r1cs_to_file
+
+def expected_json(r1cs, compact):
+    if compact:
+        return json.dumps(r1cs.to_json_format(), separators=(',', ':'))
+    return json.dumps(r1cs.to_json_format(), indent=2)
+
+def check_writer(r1cs, filename):
+    for compact in [False, True]:
+        write_r1cs_to_file(r1cs, filename, compact)
+        with open(filename, 'r') as f:
+            assert(f.read() == expected_json(r1cs, compact))
+
+def test_write_single_r1cs(tmp_path):
+    r1cs = create_with_extra_variables()
+    check_writer(r1cs, str(tmp_path / 'r1cs.json'))
+    r1cs.constraints = []
+    check_writer(r1cs, str(tmp_path / 'empty.json'))
+
+def test_write_ensemble(tmp_path):
+    check_writer(create_dependent_ensemble(), str(tmp_path / 'ensemble.json'))
@@ -0,0 +1,17 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.r1cs_creator import create_with_extra_variables
+from optimizations.satisfiability import find_unsatisfied
+
+def test_find_unsatisfied():
+    r1cs = create_with_extra_variables()
+    assert(find_unsatisfied(r1cs) is None)
+    num_witness_variables = r1cs.num_variables - r1cs.io_size - r1cs.num_public_inputs
+    r1cs.witness[3 * num_witness_variables - 1] += 1
+    iteration, _ = find_unsatisfied(r1cs)
+    assert(iteration in [2, 3])
+
+def test_full_optimize_self_check():
+    r1cs = create_with_extra_variables()
+    r1cs.full_optimize(check=True)
+    assert(find_unsatisfied(r1cs) is None)
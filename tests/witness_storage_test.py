@@ -0,0 +1,24 @@
+import sys
+sys.path.append('../optimizations')
+from optimizations.witness_storage import Witness
+from copy import deepcopy
+
+def test_appended_columns_are_not_shared():
+    a = Witness([1, 2, 3, 4], 2, 2)
+    a.set_column(0, [10, 30])
+    b = Witness(a.source, 2, 2)
+    b.select_columns([])
+    b.append_columns(a, [0, 1])
+    b[0] = 99
+    assert(a.column(0) == [10, 30])
+    assert(b.column(0) == [99, 30])
+    a[2] = 7
+    assert(b.column(0) == [99, 30])
+    assert(b.column(1) == [2, 4])
+
+def test_deepcopy_is_independent():
+    a = Witness([1, 2, 3, 4], 2, 2)
+    b = deepcopy(a)
+    b[1] = 5
+    assert(a.column(1) == [2, 4])
+    assert(b.column(1) == [5, 4])